@@ -0,0 +1,224 @@
+"""
+Game rules and state: pieces, the 8x8 board, turns and game over.
+Nothing here imports pygame; the window lives in ui.py.
+"""
+from enum import Enum
+
+import position
+
+BOARD_SIZE = 8
+
+# ---------------------- ENUMS & PIECE CLASS ----------------------
+class PieceType(Enum):
+    PAWN = 1
+    ROOK = 2
+    KNIGHT = 3
+    BISHOP = 4
+    QUEEN = 5
+    KING = 6
+
+class PieceColor(Enum):
+    WHITE = 1
+    BLACK = 2
+
+class Piece:
+    def __init__(self, ptype: PieceType, color: PieceColor):
+        self.piece_type = ptype
+        self.color = color
+        self.has_moved = False
+
+    def code(self):
+        """Int piece code used by position.py."""
+        color = position.WHITE if self.color == PieceColor.WHITE else position.BLACK
+        return position.make_piece(self.piece_type.value, color, self.has_moved)
+
+# ---------------------- BOARD / GAME LOGIC ----------------------
+class Board:
+    def __init__(self):
+        self.board = [[None]*BOARD_SIZE for _ in range(BOARD_SIZE)]
+        self.selected_piece = None
+        self.valid_moves = []
+        self.turn = PieceColor.WHITE
+        self.game_over = False
+        self.winner = None
+        self.move_history = []
+        self.last_move = None
+        self.ai_thinking = False
+        self.setup_board()
+
+    def sync_position(self):
+        """
+        Rebuild self.position, the compact copy of self.board that move
+        generation runs on. move_piece keeps it in step; call this after
+        editing self.board directly.
+        """
+        squares = [position.EMPTY] * 64
+        for r in range(BOARD_SIZE):
+            for c in range(BOARD_SIZE):
+                p = self.board[r][c]
+                if p:
+                    squares[r*8 + c] = p.code()
+        side = position.WHITE if self.turn == PieceColor.WHITE else position.BLACK
+        self.position = position.Position(squares, side)
+        self._moves_key = None
+        self._moves_cache = {}
+
+    def setup_board(self):
+        # pawns
+        for c in range(8):
+            self.board[1][c] = Piece(PieceType.PAWN, PieceColor.BLACK)
+            self.board[6][c] = Piece(PieceType.PAWN, PieceColor.WHITE)
+        # rooks
+        self.board[0][0] = Piece(PieceType.ROOK, PieceColor.BLACK)
+        self.board[0][7] = Piece(PieceType.ROOK, PieceColor.BLACK)
+        self.board[7][0] = Piece(PieceType.ROOK, PieceColor.WHITE)
+        self.board[7][7] = Piece(PieceType.ROOK, PieceColor.WHITE)
+        # knights
+        self.board[0][1] = Piece(PieceType.KNIGHT, PieceColor.BLACK)
+        self.board[0][6] = Piece(PieceType.KNIGHT, PieceColor.BLACK)
+        self.board[7][1] = Piece(PieceType.KNIGHT, PieceColor.WHITE)
+        self.board[7][6] = Piece(PieceType.KNIGHT, PieceColor.WHITE)
+        # bishops
+        self.board[0][2] = Piece(PieceType.BISHOP, PieceColor.BLACK)
+        self.board[0][5] = Piece(PieceType.BISHOP, PieceColor.BLACK)
+        self.board[7][2] = Piece(PieceType.BISHOP, PieceColor.WHITE)
+        self.board[7][5] = Piece(PieceType.BISHOP, PieceColor.WHITE)
+        # queens
+        self.board[0][3] = Piece(PieceType.QUEEN, PieceColor.BLACK)
+        self.board[7][3] = Piece(PieceType.QUEEN, PieceColor.WHITE)
+        # kings
+        self.board[0][4] = Piece(PieceType.KING, PieceColor.BLACK)
+        self.board[7][4] = Piece(PieceType.KING, PieceColor.WHITE)
+        self.start_fen = position.START_FEN
+        self.start_fullmove = 1
+        self.sync_position()
+
+    def set_fen(self, fen):
+        """
+        Start from a FEN position instead: replaces the pieces and the side to
+        move, and clears the selection and move history. Raises ValueError.
+        """
+        squares, side = position.parse_fen(fen)
+        fields = fen.split()
+        self.start_fullmove = int(fields[5]) if len(fields) > 5 and fields[5].isdigit() else 1
+        for sq, code in enumerate(squares):
+            p = None
+            if code:
+                color = PieceColor.WHITE if position.piece_color(code) == position.WHITE else PieceColor.BLACK
+                p = Piece(PieceType(code & position.TYPE_MASK), color)
+                p.has_moved = bool(code & position.MOVED)
+            self.board[sq >> 3][sq & 7] = p
+        self.turn = PieceColor.WHITE if side == position.WHITE else PieceColor.BLACK
+        self.selected_piece = None
+        self.valid_moves = []
+        self.game_over = False
+        self.winner = None
+        self.move_history = []
+        self.last_move = None
+        self.start_fen = position.format_fen(squares, side, self.start_fullmove)
+        self.sync_position()
+        self.check_game_over()
+
+    def fen(self):
+        """The current position as FEN, with the move number counted from the start position."""
+        black_started = self.start_fen.split()[1] == "b"
+        fullmove = self.start_fullmove + (len(self.move_history) + black_started) // 2
+        return position.format_fen(self.position.squares, self.position.side, fullmove)
+
+    def in_bounds(self, r, c):
+        return 0 <= r < BOARD_SIZE and 0 <= c < BOARD_SIZE
+
+    def moves_by_square(self, color):
+        """
+        Moves for color in the current position, grouped by from-square.
+        Generated by the same position.py code the AI searches with and
+        cached until the position changes.
+        """
+        side = position.WHITE if color == PieceColor.WHITE else position.BLACK
+        key = (self.position.hash, side)
+        if key != self._moves_key:
+            grouped = {}
+            for mv in self.position.generate_moves(side):
+                frm, to = position.decode_move(mv)
+                grouped.setdefault(frm, []).append(to)
+            self._moves_key = key
+            self._moves_cache = grouped
+        return self._moves_cache
+
+    def get_valid_moves(self, row, col):
+        p = self.board[row][col]
+        if not p: return []
+        return list(self.moves_by_square(p.color).get((row, col), ()))
+
+    def select_square(self, row, col):
+        """
+        Click on (row, col): select a piece of the side to move, or return
+        the move ((fr, fc), (row, col)) if the selected piece can go there.
+        The caller plays it with play_move.
+        """
+        if self.game_over or not self.in_bounds(row, col): return None
+        p = self.board[row][col]
+        if self.selected_piece:
+            if (row, col) in self.valid_moves:
+                return self.selected_piece, (row, col)
+            elif p and p.color == self.turn:
+                self.selected_piece = (row, col)
+                self.valid_moves = self.get_valid_moves(row, col)
+            else:
+                self.selected_piece = None
+                self.valid_moves = []
+        else:
+            if p and p.color == self.turn:
+                self.selected_piece = (row, col)
+                self.valid_moves = self.get_valid_moves(row, col)
+        return None
+
+    def play_move(self, fr, fc, tr, tc):
+        self.last_move = ((fr, fc), (tr, tc))
+        self.move_history.append(self.last_move)
+        self.move_piece(fr, fc, tr, tc)
+        self.selected_piece = None
+        self.valid_moves = []
+        self.turn = PieceColor.BLACK if self.turn == PieceColor.WHITE else PieceColor.WHITE
+        self.check_game_over()
+
+    def move_piece(self, fr, fc, tr, tc):
+        p = self.board[fr][fc]
+        self.board[tr][tc] = p
+        self.board[fr][fc] = None
+        if p:
+            p.has_moved = True
+            self.position.make_move(position.encode_move(fr*8 + fc, tr*8 + tc))
+
+    def in_check(self):
+        """True if the side to move is in check."""
+        side = position.WHITE if self.turn == PieceColor.WHITE else position.BLACK
+        return self.position.in_check(side)
+
+    def checked_king(self):
+        """(row, col) of the side to move's king when it is in check, else None."""
+        if not self.in_check():
+            return None
+        side = position.WHITE if self.turn == PieceColor.WHITE else position.BLACK
+        sq = self.position.bb[position.make_piece(position.KING, side)].bit_length() - 1
+        return sq >> 3, sq & 7
+
+    def check_game_over(self):
+        """
+        The side to move without a legal move is checkmated (winner is the
+        other side) or stalemated (winner None). A position missing a king
+        (set_fen) is lost for that side.
+        """
+        pos = self.position
+        if not pos.bb[position.KING]:
+            self.game_over = True
+            self.winner = PieceColor.BLACK
+        elif not pos.bb[position.KING | position.BLACK_BIT]:
+            self.game_over = True
+            self.winner = PieceColor.WHITE
+        elif not self.moves_by_square(self.turn):
+            self.game_over = True
+            if self.in_check():
+                self.winner = PieceColor.BLACK if self.turn == PieceColor.WHITE else PieceColor.WHITE
+            else:
+                self.winner = None
@@ -0,0 +1,166 @@
+"""
+Opening book for ChessAI.
+
+The file uses the Polyglot layout: 16-byte big-endian records (key u64,
+move u16, weight u16, learn u32) sorted by key. Several records may share
+a key, one per book move. The key is our own Position.hash (fixed-seed
+Zobrist), not Polyglot's, and the move is the engine's from | to << 6.
+
+The file is memory-mapped read-only and searched in place with a binary
+search. Opening it costs nothing up front, and every process that uses
+the same book shares the same pages.
+"""
+import mmap
+import os
+import random
+import struct
+
+import position
+
+RECORD = struct.Struct(">QHHI")
+RECORD_BYTES = RECORD.size    # 16
+_KEY = struct.Struct(">Q")
+
+BOOK_PATH = os.path.join(os.path.dirname(__file__), "assets", "book.bin")
+
+# Main lines for `build_book`, in coordinate notation. The game has no
+# castling, en passant or promotion, so lines stop before any of those.
+OPENING_LINES = [
+    # open games
+    "e2e4 e7e5 g1f3 b8c6 f1b5 a7a6 b5a4 g8f6",
+    "e2e4 e7e5 g1f3 b8c6 f1b5 g8f6 d2d3 f8c5",
+    "e2e4 e7e5 g1f3 b8c6 f1c4 f8c5 c2c3 g8f6",
+    "e2e4 e7e5 g1f3 b8c6 f1c4 g8f6 d2d3 f8e7",
+    "e2e4 e7e5 g1f3 b8c6 d2d4 e5d4 f3d4 g8f6",
+    "e2e4 e7e5 g1f3 g8f6 f3e5 d7d6 e5f3 f6e4",
+    "e2e4 e7e5 b1c3 g8f6 g1f3 b8c6 f1b5 f8b4",
+    # semi-open games
+    "e2e4 c7c5 g1f3 d7d6 d2d4 c5d4 f3d4 g8f6 b1c3 a7a6",
+    "e2e4 c7c5 g1f3 b8c6 d2d4 c5d4 f3d4 g8f6 b1c3 e7e5",
+    "e2e4 c7c5 g1f3 e7e6 d2d4 c5d4 f3d4 b8c6 b1c3 d8c7",
+    "e2e4 c7c5 b1c3 b8c6 g2g3 g7g6 f1g2 f8g7",
+    "e2e4 e7e6 d2d4 d7d5 b1c3 g8f6 c1g5 f8e7",
+    "e2e4 e7e6 d2d4 d7d5 b1d2 c7c5 g1f3 b8c6",
+    "e2e4 c7c6 d2d4 d7d5 b1c3 d5e4 c3e4 c8f5",
+    "e2e4 d7d5 e4d5 d8d5 b1c3 d5a5 d2d4 g8f6",
+    "e2e4 d7d6 d2d4 g8f6 b1c3 g7g6 f2f4 f8g7",
+    # closed games
+    "d2d4 d7d5 c2c4 e7e6 b1c3 g8f6 c1g5 f8e7",
+    "d2d4 d7d5 c2c4 c7c6 g1f3 g8f6 b1c3 d5c4",
+    "d2d4 d7d5 c2c4 d5c4 g1f3 g8f6 e2e3 e7e6",
+    "d2d4 g8f6 c2c4 e7e6 b1c3 f8b4 e2e3 b7b6",
+    "d2d4 g8f6 c2c4 e7e6 g1f3 b7b6 g2g3 c8b7",
+    "d2d4 g8f6 c2c4 g7g6 b1c3 f8g7 e2e4 d7d6",
+    "d2d4 g8f6 c2c4 g7g6 b1c3 d7d5 c4d5 f6d5",
+    "d2d4 g8f6 c2c4 c7c5 d4d5 e7e6 b1c3 e6d5",
+    # flank openings
+    "c2c4 e7e5 b1c3 g8f6 g1f3 b8c6 g2g3 d7d5",
+    "c2c4 g8f6 b1c3 e7e6 g1f3 d7d5 d2d4 f8e7",
+    "g1f3 d7d5 d2d4 g8f6 c2c4 e7e6 b1c3 c7c6",
+    "g1f3 g8f6 c2c4 g7g6 b1c3 f8g7 e2e4 d7d6",
+]
+
+
+class OpeningBook:
+    def __init__(self, path=BOOK_PATH):
+        self.path = path
+        self._file = open(path, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        if size % RECORD_BYTES:
+            self._file.close()
+            raise ValueError(f"{path}: size {size} is not a whole number of {RECORD_BYTES}-byte records")
+        self.count = size // RECORD_BYTES
+        # mmap cannot map an empty file; an empty book just never hits
+        self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else None
+
+    def __getstate__(self):
+        # pickles as the path; the copy maps the file again
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __len__(self):
+        return self.count
+
+    def entries(self, key):
+        """[(move, weight), ...] stored for key, in file order."""
+        m = self._map
+        if m is None:
+            return []
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if _KEY.unpack_from(m, mid * RECORD_BYTES)[0] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        found = []
+        while lo < self.count:
+            k, move, weight, _ = RECORD.unpack_from(m, lo * RECORD_BYTES)
+            if k != key:
+                break
+            found.append((move, weight))
+            lo += 1
+        return found
+
+    def probe(self, state, rng=random):
+        """
+        A book move for the side to move in state, picked at random in
+        proportion to its weight, or 0. Moves the generator does not produce
+        for this position are skipped, so a hash collision never plays an
+        illegal move.
+        """
+        found = self.entries(state.hash)
+        if not found:
+            return 0
+        legal = set(state.generate_moves(state.side))
+        found = [(mv, w) for mv, w in found if mv in legal and w > 0]
+        if not found:
+            return 0
+        pick = rng.randrange(sum(w for _, w in found))
+        for mv, w in found:
+            pick -= w
+            if pick < 0:
+                return mv
+        return found[-1][0]
+
+
+def build_book(path, lines=OPENING_LINES):
+    """
+    Write a book from move lines (strings of coordinate moves, played from
+    the initial position). Each position on a line gets its next move, and
+    a move's weight is the number of lines that play it. Returns the number
+    of records written. Raises ValueError on a move that is not possible.
+    """
+    weights = {}
+    for n, line in enumerate(lines, 1):
+        state = position.Position.from_fen(position.START_FEN)
+        for text in line.split():
+            mv = position.uci_to_move(text)
+            if mv not in state.generate_moves(state.side):
+                raise ValueError(f"line {n}: {text} is not a move in {state.fen()}")
+            weights[state.hash, mv] = weights.get((state.hash, mv), 0) + 1
+            state.make_move(mv)
+    records = sorted(weights.items())
+    with open(path, "wb") as f:
+        for (key, mv), w in records:
+            f.write(RECORD.pack(key, mv, min(w, 0xFFFF), 0))
+    return len(records)
+
+
+def read_lines(path):
+    """Move lines from a text file: one line per row, '#' starts a comment."""
+    lines = []
+    with open(path, encoding="utf-8") as f:
+        for row in f:
+            row = row.split("#", 1)[0].strip()
+            if row:
+                lines.append(row)
+    return lines
@@ -0,0 +1,267 @@
+"""
+Endgame tables for king and one piece against a lone king (KQK, KRK, KPK).
+
+generate_table() solves every position of such an ending by retrograde
+analysis. It starts from the checkmates and walks backwards through the
+moves, so each position gets its exact win/draw/loss and distance to
+mate. A table is one byte per position, stored with the strong side as
+White (see index()); Black-strong positions are probed mirrored. Values:
+
+    0          draw (includes stalemate and the piece being captured)
+    1..254     plies to mate + 1; odd distance = side to move wins,
+               even distance = side to move is mated
+    255        not a legal position (overlapping or adjacent kings,
+               pawn on its own back rank, the side not to move in check)
+
+Files are a 16-byte header followed by the table. They are memory-mapped
+read-only when probed, so a lookup costs one byte read and processes
+share the pages. The game has no promotion, so a KPK pawn that reaches
+the last rank stays a pawn and K+P can never mate: the KPK table comes
+out all draws. It is kept so the probe answers those positions without a
+search.
+"""
+import mmap
+import os
+import struct
+
+import position
+from position import (BIT, KING_ATTACKS, NOT_FILE_A, NOT_FILE_H, rook_attacks, bishop_attacks,
+                      PAWN, ROOK, QUEEN, KING, BLACK, TYPE_MASK)
+
+TABLES_DIR = os.path.join(os.path.dirname(__file__), "tables")
+ENDINGS = {"kqk": QUEEN, "krk": ROOK, "kpk": PAWN}
+
+MAGIC = b"CVEG"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sHB9x")    # magic, version, piece type; 16 bytes
+TABLE_SIZE = 2 * 64 * 64 * 64
+DRAW = 0
+INVALID = 255
+
+
+def index(weak_to_move, wk, bk, x):
+    """Table slot: strong king wk, lone king bk, strong piece x (White = strong side)."""
+    return weak_to_move << 18 | wk << 12 | bk << 6 | x
+
+
+def table_path(name, directory=TABLES_DIR):
+    return os.path.join(directory, name + ".egt")
+
+
+def _bits(bb):
+    while bb:
+        low = bb & -bb
+        yield low.bit_length() - 1
+        bb ^= low
+
+
+def _piece_attacks(ptype, sq, occ):
+    if ptype == QUEEN:
+        return rook_attacks(sq, occ) | bishop_attacks(sq, occ)
+    if ptype == ROOK:
+        return rook_attacks(sq, occ)
+    # a white pawn, which moves towards row 0
+    return ((BIT[sq] >> 9) & NOT_FILE_H) | ((BIT[sq] >> 7) & NOT_FILE_A)
+
+
+def _strong_unmoves(ptype, wk, bk, x):
+    """Slots (strong to move) whose strong move leads to (wk, bk, x) with the weak side to move."""
+    occ = BIT[wk] | BIT[bk] | BIT[x]
+    for s in _bits(KING_ATTACKS[wk] & ~occ):
+        yield index(0, s, bk, x)
+    if ptype == PAWN:
+        # pawns only move forward (towards row 0): undo a single or double push
+        if x < 48 and not occ & BIT[x + 8]:
+            yield index(0, wk, bk, x + 8)
+            if 32 <= x < 40 and not occ & BIT[x + 16]:
+                yield index(0, wk, bk, x + 16)
+    else:
+        for s in _bits(_piece_attacks(ptype, x, occ) & ~occ):
+            yield index(0, wk, bk, s)
+
+
+def _weak_unmoves(wk, bk, x):
+    """Slots (weak to move) whose king move leads to (wk, bk, x) with the strong side to move."""
+    for s in _bits(KING_ATTACKS[bk] & ~(BIT[wk] | BIT[x] | KING_ATTACKS[wk])):
+        yield index(1, wk, s, x)
+
+
+def generate_table(ptype):
+    """Solve K + ptype vs K; returns the table as a bytearray (see the module docstring)."""
+    table = bytearray(TABLE_SIZE)
+    # legal moves left for each weak-to-move position that do not lose yet
+    remaining = bytearray(TABLE_SIZE)
+    frontier = []
+    for wk in range(64):
+        for bk in range(64):
+            if wk == bk or KING_ATTACKS[wk] & BIT[bk]:
+                for x in range(64):
+                    table[index(0, wk, bk, x)] = table[index(1, wk, bk, x)] = INVALID
+                continue
+            for x in range(64):
+                strong_i = index(0, wk, bk, x)
+                weak_i = index(1, wk, bk, x)
+                if x == wk or x == bk or (ptype == PAWN and x >= 56):
+                    table[strong_i] = table[weak_i] = INVALID
+                    continue
+                # the lone king does not block attacks along the line it stands on
+                piece = _piece_attacks(ptype, x, BIT[wk] | BIT[x])
+                if piece & BIT[bk]:
+                    table[strong_i] = INVALID
+                n = (KING_ATTACKS[bk] & ~(KING_ATTACKS[wk] | piece | BIT[wk])).bit_count()
+                remaining[weak_i] = n
+                if not n and piece & BIT[bk]:
+                    table[weak_i] = 1
+                    frontier.append(weak_i)
+    plies = 0
+    while frontier:
+        found = []
+        if plies % 2 == 0:
+            # weak side to move is mated in `plies`: any strong move into it wins
+            for i in frontier:
+                for p in _strong_unmoves(ptype, (i >> 12) & 63, (i >> 6) & 63, i & 63):
+                    if table[p] == DRAW:
+                        table[p] = plies + 2
+                        found.append(p)
+        else:
+            # strong side wins: a weak position is lost once every move leads to a win
+            for i in frontier:
+                for p in _weak_unmoves((i >> 12) & 63, (i >> 6) & 63, i & 63):
+                    if table[p] == DRAW and remaining[p]:
+                        remaining[p] -= 1
+                        if not remaining[p]:
+                            table[p] = plies + 2
+                            found.append(p)
+        frontier = found
+        plies += 1
+    return table
+
+
+def write_table(path, ptype, table):
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "wb") as f:
+        f.write(HEADER.pack(MAGIC, FORMAT_VERSION, ptype))
+        f.write(table)
+
+
+def table_summary(table):
+    """Counts of won/lost/drawn positions and the longest mate, in plies."""
+    wins = losses = draws = longest = 0
+    for v in table:
+        if v == INVALID:
+            continue
+        if v == DRAW:
+            draws += 1
+        elif (v - 1) % 2:
+            wins += 1
+            longest = max(longest, v - 1)
+        else:
+            losses += 1
+    return {"wins": wins, "losses": losses, "draws": draws, "longest_mate": longest}
+
+
+class EndgameTable:
+    def __init__(self, path):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        if len(self._map) != HEADER.size + TABLE_SIZE:
+            self._map.close()
+            raise ValueError(f"{path}: not an endgame table")
+        magic, version, self.piece = HEADER.unpack_from(self._map)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self._map.close()
+            raise ValueError(f"{path}: table format {version}, expected {FORMAT_VERSION}; regenerate it")
+
+    def __getstate__(self):
+        return {"path": self.path}
+
+    def __setstate__(self, state):
+        self.__init__(state["path"])
+
+    def close(self):
+        self._map.close()
+
+    def value(self, weak_to_move, wk, bk, x):
+        return self._map[HEADER.size + index(weak_to_move, wk, bk, x)]
+
+
+class EndgameTables:
+    """The tables found in a directory, probed by material."""
+
+    def __init__(self, directory=TABLES_DIR):
+        self.tables = {}
+        for name, ptype in ENDINGS.items():
+            path = table_path(name, directory)
+            if not os.path.exists(path):
+                continue
+            try:
+                self.tables[ptype] = EndgameTable(path)
+            except ValueError:
+                # stale or foreign file: play without it until it is regenerated
+                continue
+
+    def close(self):
+        for table in self.tables.values():
+            table.close()
+        self.tables = {}
+
+    def probe(self, state):
+        """
+        (move, plies) for a position covered by a table, else None. move is
+        the best move for the side to move: the fastest mate when winning,
+        the longest defence when losing, one that keeps the draw otherwise.
+        plies is the distance to mate, positive when the side to move wins,
+        negative when it loses, 0 for a draw.
+        """
+        if not self.tables:
+            return None
+        occ = state.occ[0] | state.occ[1]
+        if occ.bit_count() != 3:
+            return None
+        kings = []
+        x = -1
+        for sq in _bits(occ):
+            if state.squares[sq] & TYPE_MASK == KING:
+                kings.append(sq)
+            else:
+                x = sq
+        table = self.tables.get(state.squares[x] & TYPE_MASK) if x >= 0 else None
+        if table is None:
+            return None
+        strong = position.piece_color(state.squares[x])
+        wk, bk = kings if position.piece_color(state.squares[kings[0]]) == strong else kings[::-1]
+        # tables hold White as the strong side; flipping the rows also turns a black pawn around
+        flip = 56 if strong == BLACK else 0
+        weak_to_move = int(state.side != strong)
+        root = table.value(weak_to_move, wk ^ flip, bk ^ flip, x ^ flip)
+        if root == INVALID:
+            return None
+        best, best_rank = 0, None
+        for mv in state.generate_moves(state.side):
+            frm, to = mv & 63, mv >> 6
+            if weak_to_move:
+                if to == x:
+                    # capturing the piece draws if it is not defended
+                    v = INVALID if KING_ATTACKS[wk] & BIT[to] else DRAW
+                else:
+                    v = table.value(0, wk ^ flip, to ^ flip, x ^ flip)
+            elif frm == wk:
+                v = table.value(1, to ^ flip, bk ^ flip, x ^ flip)
+            else:
+                v = table.value(1, wk ^ flip, bk ^ flip, to ^ flip)
+            if v == INVALID:
+                continue
+            # rank from the mover's side: quick wins first, then draws, then long losses
+            if v == DRAW:
+                rank = 0
+            elif (v - 1) % 2:
+                rank = -1000 + v
+            else:
+                rank = 1000 - v
+            if best_rank is None or rank > best_rank:
+                best, best_rank = mv, rank
+        if not best:
+            return None
+        d = root - 1
+        return best, 0 if root == DRAW else (d if d % 2 else -d)
@@ -0,0 +1,840 @@
+"""
+The AI: alpha-beta search on position.py Positions, its helpers for
+running on a background thread or a process pool, and search reports.
+Importing it does no display work.
+"""
+import os
+import json
+import time
+import random
+import queue
+import threading
+import multiprocessing
+
+import position
+from board import Board, PieceType, PieceColor
+from transposition import TranspositionTable, EXACT, LOWER, UPPER
+from book import OpeningBook, BOOK_PATH
+from endgame import EndgameTables, TABLES_DIR
+
+# ---------------------- AI (Minimax + Alpha-Beta) ----------------------
+MAX_SEARCH_DEPTH = 64
+# move ordering scores: hash move, then captures (MVV-LVA), killers, history
+TT_MOVE_SCORE = 1 << 40
+CAPTURE_SCORE = 1 << 32
+KILLER_SCORES = (1 << 31, (1 << 31) - 1)
+HISTORY_MAX = 1 << 30
+# shallower iterations are cheaper than a round trip to the pool and run in-process
+PARALLEL_MIN_DEPTH = 3
+# quiescence: a capture is skipped when even winning the victim plus this margin cannot raise alpha
+DELTA_MARGIN = 200
+# being mated scores -(MATE_SCORE - plies from the root); anything beyond MATE_BOUND is a mate
+MATE_SCORE = 1000000
+MATE_BOUND = MATE_SCORE - 1000
+
+
+class SearchAborted(Exception):
+    """Raised inside the search when the time budget is used up or stop() was called."""
+
+
+class SearchStats:
+    """
+    What one choose_move/search_position call did. nodes counts every
+    node once, qnodes the quiescence part of them (horizon nodes
+    included). beta_cutoffs counts fail-highs in the main search,
+    first_move_cutoffs those caused by the first move tried. depths holds
+    (depth, seconds, nodes) per completed iteration, cumulative from the
+    start of the search. source is "search", "ponder", "book" or
+    "tables"; a book or table move has no search counts.
+    """
+    def __init__(self, source, move, depth, seconds, counters, depths=(), fen=None):
+        self.source = source
+        self.move = move
+        self.depth = depth
+        self.seconds = seconds
+        (self.nodes, self.qnodes, self.beta_cutoffs, self.first_move_cutoffs,
+         self.hash_probes, self.hash_hits) = counters
+        self.depths = list(depths)
+        self.fen = fen
+
+    @property
+    def nps(self):
+        return self.nodes / self.seconds if self.seconds > 0 else 0.0
+
+    @property
+    def first_move_cutoff_rate(self):
+        return self.first_move_cutoffs / self.beta_cutoffs if self.beta_cutoffs else 0.0
+
+    @property
+    def hash_hit_rate(self):
+        return self.hash_hits / self.hash_probes if self.hash_probes else 0.0
+
+    def as_dict(self):
+        """Plain values for one JSON line; times in milliseconds."""
+        return {
+            "fen": self.fen,
+            "source": self.source,
+            "move": position.move_to_uci(self.move) if self.move else None,
+            "depth": self.depth,
+            "ms": round(self.seconds * 1000, 1),
+            "nodes": self.nodes,
+            "nps": round(self.nps),
+            "qnodes": self.qnodes,
+            "beta_cutoffs": self.beta_cutoffs,
+            "first_move_cutoff_rate": round(self.first_move_cutoff_rate, 4),
+            "hash_probes": self.hash_probes,
+            "hash_hits": self.hash_hits,
+            "depths": [{"depth": d, "ms": round(t * 1000, 1), "nodes": n} for d, t, n in self.depths],
+        }
+
+
+class ChessAI:
+    def __init__(self, color=PieceColor.BLACK, depth=3, hash_mb=16, time_budget_ms=None,
+                 move_ordering=True, quiescence=True, qsearch_node_limit=2000, workers=1,
+                 book_path=BOOK_PATH, tables_dir=TABLES_DIR):
+        """
+        depth is the search depth when there is no time budget. With
+        time_budget_ms set, get_best_move deepens one ply at a time until the
+        budget runs out instead. move_ordering=False searches moves in
+        generator order (hash move first), for node-count comparisons.
+        quiescence resolves captures at the horizon; qsearch_node_limit caps
+        the nodes spent below one horizon node (None for no cap).
+        workers > 1 splits the root moves over a pool of that many processes.
+        book_path is the opening book consulted before searching; None, or a
+        missing file, plays without one. tables_dir holds the endgame tables
+        (`python chess.py tables`); None skips them.
+        """
+        self.color = color
+        self.depth = depth
+        self.time_budget_ms = time_budget_ms
+        self.tt = TranspositionTable(hash_mb)
+        self.completed_depth = 0
+        self._deadline = float('inf')
+        self.stop_requested = False
+        # set in pool workers: a shared flag the parent raises to stop them
+        self.stop_flag = None
+        self._root_best = None
+        self.workers = workers
+        self._pool = None
+        self._shared_alpha = None
+        self._shared_stop = None
+        self.book = OpeningBook(book_path) if book_path and os.path.exists(book_path) else None
+        self.book_rng = random.Random()
+        self.endgames = EndgameTables(tables_dir) if tables_dir else None
+        # where the last move from choose_move came from: "book", "tables" or "search"
+        self.last_source = "search"
+        self.move_ordering = move_ordering
+        self.quiescence_enabled = quiescence
+        self.qsearch_node_limit = qsearch_node_limit
+        self._qnode_stop = 0
+        self.reset_stats()
+        # SearchStats of the last choose_move/search_position, and an optional
+        # text file that gets each one as a JSON line
+        self.last_stats = None
+        self.stats_log = None
+        self.killers = [[0, 0] for _ in range(position.MAX_PLY)]
+        # history[(piece code & 15) << 6 | to], bumped when a quiet move causes a cutoff
+        self.history = [0] * (16 * 64)
+        self.piece_values = {
+            PieceType.PAWN: 100,
+            PieceType.KNIGHT: 320,
+            PieceType.BISHOP: 330,
+            PieceType.ROOK: 500,
+            PieceType.QUEEN: 900,
+            PieceType.KING: 20000
+        }
+        self.pawn_table = [
+            [0,0,0,0,0,0,0,0],
+            [50,50,50,50,50,50,50,50],
+            [10,10,20,30,30,20,10,10],
+            [5,5,10,25,25,10,5,5],
+            [0,0,0,20,20,0,0,0],
+            [5,-5,-10,0,0,-10,-5,5],
+            [5,10,10,-20,-20,10,10,5],
+            [0,0,0,0,0,0,0,0]
+        ]
+        self.knight_table = [[-40,-30,-20,-20,-20,-20,-30,-40],
+                              [-30,-10,10,5,5,10,-10,-30],
+                              [-30,5,15,10,10,15,5,-30],
+                              [-30,5,15,10,10,15,5,-30],
+                              [-30,0,10,15,15,10,0,-30],
+                              [-35,-5,0,5,5,0,-5,-35],
+                              [-40,-20,-10,0,0,-10,-20,-40],
+                              [-50,-40,-30,-30,-30,-30,-40,-50]]
+        self.bishop_table = [[-20,-10,-10,-10,-10,-10,-10,-20],
+                             [-10,5,0,0,0,0,5,-10],
+                             [-10,10,10,15,15,10,10,-10],
+                             [-10,0,15,20,20,15,0,-10],
+                             [-10,5,10,18,18,10,5,-10],
+                             [-10,0,10,15,15,10,0,-10],
+                             [-10,0,0,0,0,0,0,-10],
+                             [-20,-10,-10,-10,-10,-10,-10,-20]]
+        self.rook_table = [[0,0,5,10,10,5,0,0],
+                           [0,0,5,10,10,5,0,0],
+                           [0,0,5,10,10,5,0,0],
+                           [0,0,5,10,10,5,0,0],
+                           [0,0,5,10,10,5,0,0],
+                           [0,0,5,10,10,5,0,0],
+                           [25,25,25,25,25,25,25,25],
+                           [0,0,5,10,10,5,0,0]]
+        self.king_table = [[-30,-40,-40,-50,-50,-40,-40,-30],
+                           [-30,-40,-40,-50,-50,-40,-40,-30],
+                           [-30,-40,-40,-50,-50,-40,-40,-30],
+                           [-30,-40,-40,-50,-50,-40,-40,-30],
+                           [-20,-30,-30,-40,-40,-30,-30,-20],
+                           [-10,-20,-20,-20,-20,-20,-20,-10],
+                           [20,20,0,0,0,0,20,20],
+                           [20,30,10,0,0,10,30,20]]
+        self.build_eval_tables()
+        self.side = position.WHITE if color == PieceColor.WHITE else position.BLACK
+
+    def build_eval_tables(self):
+        """
+        Flatten piece_values and the piece-square tables into one list indexed
+        [(code & 15) << 6 | sq] by position.py piece code: value + positional
+        bonus, with Black's tables mirrored and stored negative so a Position
+        can keep a single white-relative sum. Call again after editing
+        piece_values or the tables.
+        """
+        tables = {
+            PieceType.PAWN: self.pawn_table,
+            PieceType.KNIGHT: self.knight_table,
+            PieceType.BISHOP: self.bishop_table,
+            PieceType.ROOK: self.rook_table,
+            PieceType.KING: self.king_table,
+        }
+        pst = [0] * (16 * 64)
+        for ptype in PieceType:
+            t = tables.get(ptype)
+            val = self.piece_values[ptype]
+            for sq in range(64):
+                r, c = sq >> 3, sq & 7
+                pst[ptype.value << 6 | sq] = val + (t[r][c] if t else 0)
+                pst[(ptype.value | position.BLACK_BIT) << 6 | sq] = -(val + (t[7 - r][c] if t else 0))
+        self.pst = pst
+        self.type_values = [0] * 7
+        for ptype in PieceType:
+            self.type_values[ptype.value] = self.piece_values[ptype]
+        # MVV-LVA rank by piece value, indexed by piece type
+        self.mvv_lva_rank = [0] * 7
+        for rank, ptype in enumerate(sorted(PieceType, key=self.piece_values.get), 1):
+            self.mvv_lva_rank[ptype.value] = rank
+
+    def evaluate_board(self, board_obj: Board):
+        total = 0
+        pst = self.pst
+        for r in range(8):
+            for c in range(8):
+                p = board_obj.board[r][c]
+                if not p: continue
+                total += pst[(p.code() & 15) << 6 | r*8 + c]
+        return total if self.color == PieceColor.WHITE else -total
+
+    def evaluate_state(self, state):
+        """evaluate_board for a search Position: a read of its incrementally kept score."""
+        return state.score if self.side == position.WHITE else -state.score
+
+    def copy_board_state(self, board_obj: Board):
+        """Copy of the board's Position with this AI to move. Done once per search, at the root."""
+        return position.Position(board_obj.position.squares, self.side, self.pst)
+
+    def all_moves(self, state, color):
+        return state.generate_moves(color)
+
+    def order_moves(self, state, moves, ply, tt_move=0):
+        """
+        Sort moves in place: hash move, captures by MVV-LVA (most valuable
+        victim, then least valuable attacker), the two killers of this ply,
+        then quiet moves by history score.
+        """
+        if not self.move_ordering:
+            if tt_move in moves:
+                moves.remove(tt_move)
+                moves.insert(0, tt_move)
+            return moves
+        sq = state.squares
+        rank = self.mvv_lva_rank
+        history = self.history
+        killer1, killer2 = self.killers[ply]
+
+        def score(mv):
+            if mv == tt_move:
+                return TT_MOVE_SCORE
+            victim = sq[mv >> 6]
+            if victim:
+                return CAPTURE_SCORE + (rank[victim & 7] << 3) - rank[sq[mv & 63] & 7]
+            if mv == killer1:
+                return KILLER_SCORES[0]
+            if mv == killer2:
+                return KILLER_SCORES[1]
+            return history[(sq[mv & 63] & 15) << 6 | mv >> 6]
+
+        moves.sort(key=score, reverse=True)
+        return moves
+
+    def record_cutoff(self, state, mv, depth):
+        """Killer and history update for a quiet move that failed high."""
+        ply = state.ply
+        killers = self.killers[ply]
+        if killers[0] != mv:
+            killers[1] = killers[0]
+            killers[0] = mv
+        idx = (state.squares[mv & 63] & 15) << 6 | mv >> 6
+        self.history[idx] += depth * depth
+        if self.history[idx] > HISTORY_MAX:
+            self.history = [h >> 1 for h in self.history]
+
+    def reset_ordering(self):
+        """Clear killers (per search) and age the history table."""
+        for k in self.killers:
+            k[0] = k[1] = 0
+        self.history = [h >> 2 for h in self.history]
+
+    def minimax(self, state, depth, alpha, beta):
+        """
+        Alpha-beta in negamax form on a Position, made and unmade in place.
+        Scores are from the side to move's point of view.
+        """
+        side = state.side
+        if depth == 0 and self.quiescence_enabled:
+            # quiescence counts the horizon node itself
+            limit = self.qsearch_node_limit
+            self._qnode_stop = self.qnodes + limit if limit is not None else float('inf')
+            return self.quiescence(state, alpha, beta), None
+        self.nodes += 1
+        if not self.nodes & 1023 and self.should_stop():
+            raise SearchAborted()
+        if depth == 0:
+            return (state.score if side == position.WHITE else -state.score), None
+        key = state.hash
+        alpha_orig = alpha
+        tt_move = 0
+        entry = self.tt.probe(key)
+        if entry:
+            tt_depth, tt_score, tt_bound, tt_move = entry
+            # mate scores are stored as distance from this node, not from the root
+            if tt_score > MATE_BOUND:
+                tt_score -= state.ply
+            elif tt_score < -MATE_BOUND:
+                tt_score += state.ply
+            # never cut at the root, it has to return a move
+            if tt_depth >= depth and state.ply:
+                if tt_bound == EXACT:
+                    return tt_score, tt_move
+                if tt_bound == LOWER:
+                    alpha = max(alpha, tt_score)
+                else:
+                    beta = min(beta, tt_score)
+                if alpha >= beta:
+                    return tt_score, tt_move
+        moves = self.all_moves(state, side)
+        if not moves:
+            # checkmate, the sooner the worse; stalemate is a draw
+            return (-(MATE_SCORE - state.ply) if state.in_check(side) else 0), None
+        self.order_moves(state, moves, state.ply, tt_move)
+        squares = state.squares
+        best_score = -float('inf')
+        best = None
+        for mv in moves:
+            state.make_move(mv)
+            score = -self.minimax(state, depth-1, -beta, -alpha)[0]
+            state.unmake_move(mv)
+            if score > best_score:
+                best_score = score
+                best = mv
+            alpha = max(alpha, score)
+            if alpha >= beta:
+                self.beta_cutoffs += 1
+                if mv == moves[0]:
+                    self.first_move_cutoffs += 1
+                if not squares[mv >> 6] and self.move_ordering:
+                    self.record_cutoff(state, mv, depth)
+                break
+        if best_score <= alpha_orig:
+            bound = UPPER
+        elif best_score >= beta:
+            bound = LOWER
+        else:
+            bound = EXACT
+        stored = best_score
+        if stored > MATE_BOUND:
+            stored += state.ply
+        elif stored < -MATE_BOUND:
+            stored -= state.ply
+        self.tt.store(key, depth, stored, bound, best)
+        return best_score, best
+
+    def quiescence(self, state, alpha, beta):
+        """
+        Capture-only search below the horizon. The side to move may stand pat
+        on the static score; captures that cannot lift the score above alpha
+        even with DELTA_MARGIN to spare are pruned.
+        """
+        self.nodes += 1
+        self.qnodes += 1
+        if not self.nodes & 1023 and self.should_stop():
+            raise SearchAborted()
+        side = state.side
+        stand_pat = state.score if side == position.WHITE else -state.score
+        if stand_pat >= beta or self.qnodes >= self._qnode_stop:
+            return stand_pat
+        if stand_pat > alpha:
+            alpha = stand_pat
+        captures = state.generate_moves(side, captures_only=True)
+        self.order_moves(state, captures, state.ply)
+        squares = state.squares
+        values = self.type_values
+        best_score = stand_pat
+        for mv in captures:
+            if stand_pat + values[squares[mv >> 6] & 7] + DELTA_MARGIN <= alpha:
+                continue
+            state.make_move(mv)
+            score = -self.quiescence(state, -beta, -alpha)
+            state.unmake_move(mv)
+            if score > best_score:
+                best_score = score
+                if score > alpha:
+                    alpha = score
+                    if alpha >= beta:
+                        break
+        return best_score
+
+    def search_root(self, state, depth, first_move=None):
+        """One iteration at the root; first_move (the previous iteration's best) is searched first."""
+        moves = self.all_moves(state, state.side)
+        self.order_moves(state, moves, state.ply, first_move)
+        alpha, beta = -float('inf'), float('inf')
+        best_score = -float('inf')
+        best = None
+        for mv in moves:
+            state.make_move(mv)
+            score = -self.minimax(state, depth-1, -beta, -alpha)[0]
+            state.unmake_move(mv)
+            if score > best_score:
+                best_score = score
+                best = mv
+                # kept so an interrupted iteration can still report it
+                self._root_best = best
+            alpha = max(alpha, score)
+        if best is not None:
+            self.tt.store(state.hash, depth, best_score, EXACT, best)
+        return best_score, best
+
+    def __getstate__(self):
+        # what a pool worker needs; the pool and its shared values stay in the parent
+        state = self.__dict__.copy()
+        state.update(_pool=None, _shared_alpha=None, _shared_stop=None, stop_flag=None, workers=1,
+                     book=None, endgames=None, stats_log=None)
+        return state
+
+    def reset_stats(self):
+        """Zero the search counters; hash probes and hits are counted from the table's own counters."""
+        self.nodes = 0
+        self.qnodes = 0
+        self.beta_cutoffs = 0
+        self.first_move_cutoffs = 0
+        self._hash_base = (self.tt.probes, self.tt.hits)
+        # hash counts reported by pool workers, whose tables are their own
+        self._pool_hash = [0, 0]
+        self._iterations = []
+        self._search_start = time.perf_counter()
+
+    def counters(self):
+        """(nodes, qnodes, beta cutoffs, first-move cutoffs, hash probes, hash hits) since reset_stats."""
+        return (self.nodes, self.qnodes, self.beta_cutoffs, self.first_move_cutoffs,
+                self.tt.probes - self._hash_base[0] + self._pool_hash[0],
+                self.tt.hits - self._hash_base[1] + self._pool_hash[1])
+
+    def add_counters(self, counters):
+        """Add a pool worker's counters to this search's."""
+        nodes, qnodes, cutoffs, first, probes, hits = counters
+        self.nodes += nodes
+        self.qnodes += qnodes
+        self.beta_cutoffs += cutoffs
+        self.first_move_cutoffs += first
+        self._pool_hash[0] += probes
+        self._pool_hash[1] += hits
+
+    def _iteration_done(self, depth):
+        self.completed_depth = depth
+        self._iterations.append((depth, time.perf_counter() - self._search_start, self.nodes))
+
+    def _record_stats(self, source, move, fen):
+        stats = SearchStats(source, move, self.completed_depth, time.perf_counter() - self._search_start,
+                            self.counters(), self._iterations, fen)
+        self.last_stats = stats
+        if self.stats_log is not None:
+            self.stats_log.write(json.dumps(stats.as_dict()) + "\n")
+            self.stats_log.flush()
+        return stats
+
+    def analyse(self, state, time_budget_ms=None):
+        """choose_move, returning (move, SearchStats)."""
+        mv = self.choose_move(state, time_budget_ms)
+        return mv, self.last_stats
+
+    def should_stop(self):
+        if self.stop_requested or time.perf_counter() > self._deadline:
+            return True
+        return self.stop_flag is not None and self.stop_flag.value
+
+    def stop(self):
+        """Ask a search running on another thread to return as soon as possible."""
+        self.stop_requested = True
+        if self._shared_stop is not None:
+            self._shared_stop.value = 1
+
+    def close(self):
+        """Shut down the worker pool, if one was started."""
+        if self._pool is not None:
+            self._pool.terminate()
+            self._pool.join()
+            self._pool = None
+
+    def get_best_move(self, board_obj: Board, time_budget_ms=None):
+        self.stop_requested = False
+        best = self.choose_move(self.copy_board_state(board_obj), time_budget_ms)
+        if best is None:
+            return None
+        return position.decode_move(best)
+
+    def choose_move(self, state, time_budget_ms=None, ponder=False):
+        """
+        A book move for state if there is one, then the endgame tables'
+        move, otherwise search_position.
+        """
+        mv = 0
+        if self.book is not None:
+            mv = self.book.probe(state, self.book_rng)
+            self.last_source = "book"
+        if not mv and self.endgames is not None:
+            hit = self.endgames.probe(state)
+            mv = hit[0] if hit else 0
+            self.last_source = "tables"
+        if mv:
+            self.reset_stats()
+            self.completed_depth = 0
+            self._record_stats(self.last_source, mv, state.fen())
+            return mv
+        self.last_source = "search"
+        return self.search_position(state, time_budget_ms, ponder)
+
+    def expected_reply(self, state):
+        """
+        The move the opponent (to move in state) is expected to play: the
+        hash move from the last search, else the first move in search order.
+        0 if the opponent has no move.
+        """
+        moves = self.all_moves(state, state.side)
+        if not moves:
+            return 0
+        entry = self.tt.probe(state.hash)
+        if entry and entry[3] in moves:
+            return entry[3]
+        return self.order_moves(state, moves, state.ply)[0]
+
+    def search_position(self, state, time_budget_ms=None, ponder=False):
+        """
+        Iterative deepening on a Position (this AI to move); returns an int
+        move or None. Without a time budget this searches to self.depth.
+        With one, it deepens until the budget runs out and returns the best
+        move of the deepest iteration, or the partial one if the interrupted
+        iteration already found a better move. stop() ends it the same way.
+        The search's counters are left in self.last_stats.
+
+        ponder ignores the budget's deadline: with a budget the search
+        deepens until stop(), without one it stops at self.depth as usual.
+        """
+        # taken first: a search stopped on time leaves state partway down a line
+        fen = state.fen()
+        self.reset_stats()
+        self.completed_depth = 0
+        best = self._search(state, time_budget_ms, ponder)
+        self._deadline = float('inf')
+        self._record_stats("ponder" if ponder else "search", best, fen)
+        return best
+
+    def _search(self, state, time_budget_ms, ponder):
+        budget = time_budget_ms if time_budget_ms is not None else self.time_budget_ms
+        max_depth = MAX_SEARCH_DEPTH if budget is not None else self.depth
+        timed = budget is not None and not ponder
+        self._deadline = time.perf_counter() + budget / 1000 if timed else float('inf')
+        root_moves = self.all_moves(state, state.side)
+        if not root_moves:
+            return None
+        self.tt.new_search()
+        self.reset_ordering()
+        if self.workers > 1:
+            best = self._search_parallel(state, max_depth, root_moves)
+            return best if best is not None else root_moves[0]
+        best = None
+        for depth in range(1, max_depth + 1):
+            self._root_best = None
+            try:
+                _, iter_best = self.search_root(state, depth, best)
+            except SearchAborted:
+                # the previous best is searched first, so a move found in the
+                # interrupted iteration already scored at least as well
+                if self._root_best is not None:
+                    best = self._root_best
+                break
+            best = iter_best
+            self._iteration_done(depth)
+        # stopped inside the first iteration
+        return best if best is not None else root_moves[0]
+
+    def _ensure_pool(self):
+        if self._pool is None:
+            # spawn, not fork: the game process has SDL state and threads
+            ctx = multiprocessing.get_context("spawn")
+            self._shared_alpha = ctx.Value('d', -float('inf'))
+            self._shared_stop = ctx.Value('b', 0)
+            self._pool = ctx.Pool(self.workers, initializer=_init_search_worker,
+                                  initargs=(self, self._shared_alpha, self._shared_stop))
+        return self._pool
+
+    def _search_parallel(self, state, max_depth, root_moves):
+        """
+        Root splitting. From PARALLEL_MIN_DEPTH on, each iteration searches the previous best move first
+        (one worker) to set the shared alpha, then scores the remaining root
+        moves concurrently; each worker reads the best score so far when it
+        starts a move and publishes any better score it finds.
+        """
+        pool = self._ensure_pool()
+        self._shared_stop.value = 0
+        if self.stop_requested:
+            return None
+        deadline = None
+        if self._deadline != float('inf'):
+            deadline = time.time() + (self._deadline - time.perf_counter())
+        squares, side = list(state.squares), state.side
+        self.order_moves(state, root_moves, state.ply)
+        best = None
+        for depth in range(1, max_depth + 1):
+            if depth < PARALLEL_MIN_DEPTH:
+                try:
+                    best = self.search_root(state, depth, best)[1]
+                except SearchAborted:
+                    break
+                self._iteration_done(depth)
+                continue
+            if best is not None:
+                root_moves.remove(best)
+                root_moves.insert(0, best)
+            self._shared_alpha.value = -float('inf')
+            tasks = [(squares, side, mv, depth, deadline) for mv in root_moves]
+            first, score, counters = pool.apply(_search_root_move, (tasks[0],))
+            self.add_counters(counters)
+            if score is None:
+                break
+            iter_best, iter_score = first, score
+            complete = True
+            results = pool.imap_unordered(_search_root_move, tasks[1:])
+            for mv, score, counters in results:
+                self.add_counters(counters)
+                if score is None or self.stop_requested:
+                    complete = False
+                    break
+                if score > iter_score:
+                    iter_best, iter_score = mv, score
+            if not complete:
+                # the moves still queued return at once under the stop flag;
+                # collect them so none of them runs into the next search
+                self._shared_stop.value = 1
+                for _ in results:
+                    pass
+            # the first move finished, so iter_best is at least as good as it at this depth
+            best = iter_best
+            if not complete or self.stop_requested:
+                break
+            self._iteration_done(depth)
+        return best
+
+
+# ---------------------- PARALLEL ROOT SEARCH (pool side) ----------------------
+_worker_ai = None
+_worker_alpha = None
+_worker_root_key = None
+
+
+def _init_search_worker(ai, shared_alpha, shared_stop):
+    global _worker_ai, _worker_alpha
+    _worker_ai = ai
+    _worker_ai.stop_flag = shared_stop
+    _worker_alpha = shared_alpha
+
+
+def _search_root_move(task):
+    """Score one root move to depth against the shared alpha. (move, score or None if stopped, counters)"""
+    global _worker_root_key
+    squares, side, move, depth, deadline = task
+    ai = _worker_ai
+    if ai.stop_flag.value or (deadline is not None and time.time() > deadline):
+        return move, None, (0, 0, 0, 0, 0, 0)
+    state = position.Position(squares, side, ai.pst)
+    if state.hash != _worker_root_key:
+        # new root position: age the hash table and ordering tables like a new search
+        _worker_root_key = state.hash
+        ai.tt.new_search()
+        ai.reset_ordering()
+    ai.stop_requested = False
+    ai._deadline = time.perf_counter() + (deadline - time.time()) if deadline is not None else float('inf')
+    ai.reset_stats()
+    alpha = _worker_alpha.value
+    state.make_move(move)
+    try:
+        score = -ai.minimax(state, depth-1, -float('inf'), -alpha)[0]
+    except SearchAborted:
+        return move, None, ai.counters()
+    if score > alpha:
+        with _worker_alpha.get_lock():
+            if score > _worker_alpha.value:
+                _worker_alpha.value = score
+    return move, score, ai.counters()
+
+
+class AIWorker:
+    """
+    Runs ChessAI searches on a background thread so the frame loop keeps
+    going. The main loop calls start(), then poll() every frame; cancel()
+    stops a running search and drops its result.
+
+    ponder() searches during the opponent's turn, on the position after
+    their expected reply. If start() is then called for that same
+    position, the ponder search becomes the real one (a ponder hit):
+    it gets what is left of the time budget counted from when pondering
+    began, so a reply that took longer than the budget is answered at
+    once. Any other position cancels the ponder search (a miss), and
+    start() waits for it to stop: a few ms, up to about 50 ms with a
+    worker pool. Its hash table entries stay behind for the new search
+    either way.
+    """
+    def __init__(self, ai: ChessAI):
+        self.ai = ai
+        self.results = queue.Queue()
+        self._thread = None
+        self._job = 0
+        # hash of the position being pondered, and when pondering started
+        self._ponder_key = None
+        self._ponder_start = 0.0
+        self._timer = None
+        self.ponder_hits = 0
+        self.ponder_misses = 0
+
+    @property
+    def busy(self):
+        return self._thread is not None and self._thread.is_alive()
+
+    @property
+    def pondering(self):
+        return self._ponder_key is not None
+
+    def start(self, board_obj: Board, time_budget_ms=None):
+        # copied here, on the main thread, before the board can change
+        state = self.ai.copy_board_state(board_obj)
+        if self._ponder_key is not None:
+            if state.hash == self._ponder_key:
+                self._ponder_hit(time_budget_ms)
+                return
+            self.ponder_misses += 1
+        self.cancel()
+        self._job += 1
+        self.ai.stop_requested = False
+        self._thread = threading.Thread(target=self._run, args=(self._job, state, time_budget_ms), daemon=True)
+        self._thread.start()
+
+    def ponder(self, board_obj: Board, reply=None):
+        """
+        Start searching, with the opponent to move on board_obj, the
+        position after reply (an int move; default: ai.expected_reply).
+        Returns the move pondered on, or 0 if there is nothing to ponder.
+        """
+        self.cancel()
+        state = position.Position(board_obj.position.squares, board_obj.position.side, self.ai.pst)
+        if not reply:
+            reply = self.ai.expected_reply(state)
+        if not reply:
+            return 0
+        state.make_move(reply)
+        state = position.Position(state.squares, state.side, self.ai.pst)
+        self._job += 1
+        self._ponder_key = state.hash
+        self._ponder_start = time.perf_counter()
+        self.ai.stop_requested = False
+        self._thread = threading.Thread(target=self._run, args=(self._job, state, None, True), daemon=True)
+        self._thread.start()
+        return reply
+
+    def _ponder_hit(self, time_budget_ms):
+        self.ponder_hits += 1
+        self._ponder_key = None
+        budget = time_budget_ms if time_budget_ms is not None else self.ai.time_budget_ms
+        if budget is None or not self.busy:
+            # a fixed-depth ponder search ends on its own; its result is, or will be, in the queue
+            return
+        left = self._ponder_start + budget / 1000 - time.perf_counter()
+        if left <= 0:
+            self.ai.stop()
+        else:
+            self._timer = threading.Timer(left, self.ai.stop)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _run(self, job, state, time_budget_ms, ponder=False):
+        best = self.ai.choose_move(state, time_budget_ms, ponder)
+        self.results.put((job, None if best is None else position.decode_move(best)))
+
+    def poll(self):
+        """(True, move) once the current search has finished, (False, None) before that."""
+        while True:
+            try:
+                job, move = self.results.get_nowait()
+            except queue.Empty:
+                return False, None
+            if job == self._job:
+                return True, move
+
+    def cancel(self):
+        self._job += 1
+        self._ponder_key = None
+        if self._timer is not None:
+            self._timer.cancel()
+            # a timer already firing must not stop the next search
+            self._timer.join()
+            self._timer = None
+        if self.busy:
+            self.ai.stop()
+            self._thread.join()
+        self._thread = None
+
+
+def move_ordering_report(board_obj: Board, color, depth):
+    """
+    Nodes searched to a fixed depth with and without move ordering (fresh
+    hash table each). The book and tables are off so every position is
+    searched.
+    """
+    nodes = {}
+    for ordered in (False, True):
+        ai = ChessAI(color, depth=depth, move_ordering=ordered, book_path=None, tables_dir=None)
+        ai.search_position(ai.copy_board_state(board_obj))
+        nodes["ordered" if ordered else "plain"] = ai.nodes
+    nodes["reduction"] = 1 - nodes["ordered"] / nodes["plain"] if nodes["plain"] else 0.0
+    return nodes
+
+
+def parallel_speedup_report(state, color, depth, workers):
+    """Single-process vs root-parallel search of one Position to the same depth."""
+    report = {"depth": depth, "workers": workers}
+    for name, n in (("single", 1), ("parallel", workers)):
+        ai = ChessAI(color, depth=depth, workers=n)
+        if n > 1:
+            # start the pool outside the timing
+            ai._ensure_pool()
+        start = time.perf_counter()
+        best = ai.search_position(position.Position(state.squares, state.side, ai.pst))
+        elapsed = time.perf_counter() - start
+        ai.close()
+        report[name] = {"seconds": elapsed, "nodes": ai.nodes, "move": position.move_to_uci(best) if best else None}
+    report["speedup"] = report["single"]["seconds"] / report["parallel"]["seconds"]
+    return report
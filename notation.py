@@ -0,0 +1,246 @@
+"""
+Standard chess notation: SAN moves, PGN export, and streaming PGN/EPD
+readers.
+
+The readers take any iterable of text lines, such as an open file, and
+yield one game or one EPD record at a time. Only the current game is
+held in memory, so files of any size can be processed. Castling,
+en passant and promotion do not exist in this game: SAN for them does
+not parse (ValueError), and callers skip those games and positions.
+"""
+import re
+
+import position
+from board import PieceColor
+from position import PAWN, TYPE_MASK, FEN_PIECES, FEN_LETTERS
+
+RESULTS = ("1-0", "0-1", "1/2-1/2", "*")
+_SAN = re.compile(r"^([NBRQK])?([a-h])?([1-8])?(x)?([a-h][1-8])$")
+
+
+def move_to_san(state, move):
+    """SAN for move, which must be one of state's moves for the side to move."""
+    frm, to = move & 63, move >> 6
+    piece = state.squares[frm]
+    ptype = piece & TYPE_MASK
+    capture = bool(state.squares[to])
+    dest = position.square_name(to)
+    if ptype == PAWN:
+        text = (position.square_name(frm)[0] + "x" + dest) if capture else dest
+    else:
+        text = FEN_LETTERS[ptype].upper()
+        # other pieces of the same kind that can reach the same square
+        rivals = [m & 63 for m in state.generate_moves(state.side)
+                  if m >> 6 == to and m & 63 != frm and state.squares[m & 63] & 15 == piece & 15]
+        if rivals:
+            if all((r & 7) != (frm & 7) for r in rivals):
+                text += "abcdefgh"[frm & 7]
+            elif all((r >> 3) != (frm >> 3) for r in rivals):
+                text += str(8 - (frm >> 3))
+            else:
+                text += position.square_name(frm)
+        text += ("x" if capture else "") + dest
+    state.make_move(move)
+    suffix = ""
+    if state.in_check(state.side):
+        suffix = "+" if state.generate_moves(state.side) else "#"
+    state.unmake_move(move)
+    return text + suffix
+
+
+def parse_san(state, text):
+    """
+    The int move that SAN text names for the side to move in state.
+    Raises ValueError if it names no move, or more than one.
+    """
+    san = text.rstrip("+#!?")
+    m = _SAN.match(san)
+    if not m:
+        raise ValueError(f"unsupported move {text!r}")
+    letter, file, rank, _, dest = m.groups()
+    ptype = FEN_PIECES[letter.lower()] if letter else PAWN
+    to = position.parse_square(dest)
+    found = []
+    for mv in state.generate_moves(state.side):
+        frm = mv & 63
+        if mv >> 6 != to or state.squares[frm] & TYPE_MASK != ptype:
+            continue
+        if file and "abcdefgh"[frm & 7] != file:
+            continue
+        if rank and str(8 - (frm >> 3)) != rank:
+            continue
+        found.append(mv)
+    if len(found) != 1:
+        raise ValueError(f"{text!r} is {'ambiguous' if found else 'not a move'} in {state.fen()}")
+    return found[0]
+
+
+def game_result(board_obj):
+    if not board_obj.game_over:
+        return "*"
+    if board_obj.winner is None:
+        return "1/2-1/2"
+    return "1-0" if board_obj.winner == PieceColor.WHITE else "0-1"
+
+
+def export_pgn(board_obj, headers=None):
+    """
+    PGN text of board_obj.move_history. headers adds to or overrides the
+    seven standard tags. A game that did not start from the initial
+    position gets SetUp/FEN tags.
+    """
+    result = game_result(board_obj)
+    tags = {"Event": "?", "Site": "?", "Date": "????.??.??", "Round": "?",
+            "White": "?", "Black": "?", "Result": result}
+    if board_obj.start_fen != position.START_FEN:
+        tags["SetUp"] = "1"
+        tags["FEN"] = board_obj.start_fen
+    tags.update(headers or {})
+    state = position.Position.from_fen(board_obj.start_fen)
+    number = board_obj.start_fullmove
+    tokens = []
+    for i, ((fr, fc), (tr, tc)) in enumerate(board_obj.move_history):
+        if state.side == position.WHITE:
+            tokens.append(f"{number}.")
+        elif i == 0:
+            tokens.append(f"{number}...")
+        mv = position.encode_move(fr * 8 + fc, tr * 8 + tc)
+        tokens.append(move_to_san(state, mv))
+        if state.side == position.BLACK:
+            number += 1
+        state.make_move(mv)
+    tokens.append(result)
+    lines = [f'[{name} "{value}"]' for name, value in tags.items()]
+    lines.append("")
+    row = ""
+    for tok in tokens:
+        if row and len(row) + 1 + len(tok) > 79:
+            lines.append(row)
+            row = tok
+        else:
+            row = f"{row} {tok}" if row else tok
+    lines.append(row)
+    return "\n".join(lines) + "\n"
+
+
+class PgnGame:
+    def __init__(self, headers, moves, result):
+        self.headers = headers    # tag name -> value
+        self.moves = moves        # SAN strings, main line only
+        self.result = result
+
+    def start_position(self):
+        return position.Position.from_fen(self.headers.get("FEN", position.START_FEN))
+
+    def replay(self):
+        """
+        Yield (state, move) for each main-line move; state is before the
+        move and is reused, so it can unmake the moves already played. Its
+        ply keeps counting from the start of the game: to search a yielded
+        state, search a Position(state.squares, state.side, pst) copy.
+        """
+        state = self.start_position()
+        for san in self.moves:
+            mv = parse_san(state, san)
+            yield state, mv
+            state.make_move(mv)
+
+
+_TAG = re.compile(r'^\[(\w+)\s+"(.*)"\]\s*$')
+_MOVE_NUMBER = re.compile(r"^\d+\.+")
+
+
+def _movetext_tokens(text):
+    """Main-line SAN tokens and the result from movetext; comments, NAGs and variations are dropped."""
+    moves = []
+    result = "*"
+    depth = 0
+    i = 0
+    n = len(text)
+    while i < n:
+        ch = text[i]
+        if ch == "{":
+            end = text.find("}", i)
+            i = n if end < 0 else end + 1
+            continue
+        if ch == ";":
+            end = text.find("\n", i)
+            i = n if end < 0 else end + 1
+            continue
+        if ch == "(":
+            depth += 1
+            i += 1
+            continue
+        if ch == ")":
+            depth = max(0, depth - 1)
+            i += 1
+            continue
+        if ch.isspace():
+            i += 1
+            continue
+        j = i
+        while j < n and not text[j].isspace() and text[j] not in "{}();":
+            j += 1
+        tok = text[i:j]
+        i = j
+        if depth:
+            continue
+        tok = _MOVE_NUMBER.sub("", tok)
+        if not tok or tok.startswith("$"):
+            continue
+        if tok in RESULTS:
+            result = tok
+        else:
+            moves.append(tok)
+    return moves, result
+
+
+def read_pgn(lines):
+    """Yield a PgnGame for each game in an iterable of PGN lines, one game at a time."""
+    headers = {}
+    movetext = []
+    for line in lines:
+        stripped = line.strip()
+        if stripped.startswith("[") and movetext:
+            # tags after movetext start the next game
+            moves, result = _movetext_tokens("".join(movetext))
+            yield PgnGame(headers, moves, headers.get("Result", result) if result == "*" else result)
+            headers = {}
+            movetext = []
+        if stripped.startswith("[") and not movetext:
+            m = _TAG.match(stripped)
+            if m:
+                headers[m.group(1)] = m.group(2).replace('\\"', '"')
+            continue
+        if stripped.startswith("%"):
+            continue
+        if stripped or movetext:
+            movetext.append(line if line.endswith("\n") else line + "\n")
+    if headers or any(s.strip() for s in movetext):
+        moves, result = _movetext_tokens("".join(movetext))
+        yield PgnGame(headers, moves, headers.get("Result", result) if result == "*" else result)
+
+
+def _epd_operations(text):
+    """'bm Nf3 Ng5; id "WAC.001";' -> {'bm': ['Nf3', 'Ng5'], 'id': ['WAC.001']}"""
+    ops = {}
+    for op in re.findall(r'(?:[^;"]|"[^"]*")+', text):
+        parts = re.findall(r'"[^"]*"|\S+', op)
+        if parts:
+            ops[parts[0]] = [p.strip('"') for p in parts[1:]]
+    return ops
+
+
+def read_epd(lines):
+    """Yield (fen, operations) for each EPD record in an iterable of lines; blank and '#' lines are skipped."""
+    for line in lines:
+        line = line.strip()
+        if not line or line.startswith("#"):
+            continue
+        fields = line.split(None, 4)
+        if len(fields) < 4:
+            raise ValueError(f"bad EPD record {line!r}")
+        ops = _epd_operations(fields[4]) if len(fields) > 4 else {}
+        # EPD has no move counters; they come from the hmvc/fmvn operations when given
+        fen = " ".join(fields[:4]) + f" {ops.get('hmvc', ['0'])[0]} {ops.get('fmvn', ['1'])[0]}"
+        yield fen, ops
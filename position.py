@@ -0,0 +1,554 @@
+"""
+Compact board used by the search.
+
+The 8x8 grid of Piece objects is copied once into a flat 64-square int array
+and moves are then made and taken back in place, so the search never copies
+the board. Square index is row * 8 + col with row 0 at the top (Black's back
+rank), the same orientation as Board.board.
+"""
+import random
+
+# ---------------------- PIECE CODES ----------------------
+EMPTY = 0
+# piece types share their values with PieceType
+PAWN, ROOK, KNIGHT, BISHOP, QUEEN, KING = 1, 2, 3, 4, 5, 6
+WHITE, BLACK = 0, 1
+BLACK_BIT = 8
+MOVED = 16
+TYPE_MASK = 7
+
+MAX_PLY = 256
+
+
+def make_piece(ptype, color, moved=False):
+    return ptype | (BLACK_BIT if color == BLACK else 0) | (MOVED if moved else 0)
+
+
+def piece_color(code):
+    return (code >> 3) & 1
+
+
+def encode_move(frm, to):
+    return frm | (to << 6)
+
+
+def decode_move(move):
+    """int move -> ((from_row, from_col), (to_row, to_col))"""
+    frm = move & 63
+    to = move >> 6
+    return (frm >> 3, frm & 7), (to >> 3, to & 7)
+
+
+def square_name(sq):
+    return "abcdefgh"[sq & 7] + str(8 - (sq >> 3))
+
+
+def parse_square(name):
+    return (8 - int(name[1])) * 8 + "abcdefgh".index(name[0])
+
+
+def move_to_uci(move):
+    """int move -> coordinate notation such as 'e2e4'"""
+    return square_name(move & 63) + square_name(move >> 6)
+
+
+def uci_to_move(text):
+    return encode_move(parse_square(text[0:2]), parse_square(text[2:4]))
+
+
+# ---------------------- BITBOARDS ----------------------
+# bit sq of a 64-bit int is square sq
+FULL = (1 << 64) - 1
+BIT = tuple(1 << sq for sq in range(64))
+ROW_MASK = tuple(0xFF << (8 * r) for r in range(8))
+FILE_A = sum(BIT[r * 8] for r in range(8))
+FILE_H = FILE_A << 7
+NOT_FILE_A = FULL ^ FILE_A
+NOT_FILE_H = FULL ^ FILE_H
+
+KNIGHT_DELTAS = ((2, 1), (2, -1), (-2, 1), (-2, -1), (1, 2), (1, -2), (-1, 2), (-1, -2))
+KING_DELTAS = tuple((dr, dc) for dr in (-1, 0, 1) for dc in (-1, 0, 1) if dr or dc)
+
+
+def _step_table(deltas):
+    table = []
+    for sq in range(64):
+        row, col = sq >> 3, sq & 7
+        mask = 0
+        for dr, dc in deltas:
+            r, c = row + dr, col + dc
+            if 0 <= r < 8 and 0 <= c < 8:
+                mask |= BIT[r * 8 + c]
+        table.append(mask)
+    return tuple(table)
+
+
+def _ray_table(dr, dc):
+    # every square from sq (exclusive) to the edge in one direction
+    table = []
+    for sq in range(64):
+        r, c = (sq >> 3) + dr, (sq & 7) + dc
+        mask = 0
+        while 0 <= r < 8 and 0 <= c < 8:
+            mask |= BIT[r * 8 + c]
+            r, c = r + dr, c + dc
+        table.append(mask)
+    return tuple(table)
+
+
+def _between_table():
+    # BETWEEN[a << 6 | b]: the squares strictly between a and b on a shared line, else 0
+    table = [0] * (64 * 64)
+    for a in range(64):
+        for dr, dc in KING_DELTAS:
+            r, c = (a >> 3) + dr, (a & 7) + dc
+            mask = 0
+            while 0 <= r < 8 and 0 <= c < 8:
+                table[a << 6 | (r * 8 + c)] = mask
+                mask |= BIT[r * 8 + c]
+                r, c = r + dr, c + dc
+    return tuple(table)
+
+
+KNIGHT_ATTACKS = _step_table(KNIGHT_DELTAS)
+KING_ATTACKS = _step_table(KING_DELTAS)
+# PAWN_ATTACKS[color][sq]: the squares a color pawn on sq attacks (White moves towards row 0)
+PAWN_ATTACKS = (_step_table(((-1, -1), (-1, 1))), _step_table(((1, -1), (1, 1))))
+BETWEEN = _between_table()
+# Classical ray attacks. Along a ray that grows the square index the nearest
+# blocker is the lowest set bit, otherwise the highest; everything behind the
+# blocker is masked off with the blocker's own ray.
+ROOK_POS_RAYS = (_ray_table(1, 0), _ray_table(0, 1))
+ROOK_NEG_RAYS = (_ray_table(-1, 0), _ray_table(0, -1))
+BISHOP_POS_RAYS = (_ray_table(1, 1), _ray_table(1, -1))
+BISHOP_NEG_RAYS = (_ray_table(-1, 1), _ray_table(-1, -1))
+
+
+def rook_attacks(sq, occ):
+    attacks = 0
+    for ray in ROOK_POS_RAYS:
+        a = ray[sq]
+        blockers = a & occ
+        if blockers:
+            a ^= ray[(blockers & -blockers).bit_length() - 1]
+        attacks |= a
+    for ray in ROOK_NEG_RAYS:
+        a = ray[sq]
+        blockers = a & occ
+        if blockers:
+            a ^= ray[blockers.bit_length() - 1]
+        attacks |= a
+    return attacks
+
+
+def bishop_attacks(sq, occ):
+    attacks = 0
+    for ray in BISHOP_POS_RAYS:
+        a = ray[sq]
+        blockers = a & occ
+        if blockers:
+            a ^= ray[(blockers & -blockers).bit_length() - 1]
+        attacks |= a
+    for ray in BISHOP_NEG_RAYS:
+        a = ray[sq]
+        blockers = a & occ
+        if blockers:
+            a ^= ray[blockers.bit_length() - 1]
+        attacks |= a
+    return attacks
+
+
+# lines through each square on an empty board: where a slider could attack it from
+ROOK_LINES = tuple(rook_attacks(sq, 0) for sq in range(64))
+BISHOP_LINES = tuple(bishop_attacks(sq, 0) for sq in range(64))
+
+
+# ---------------------- ZOBRIST ----------------------
+# fixed seed: keys must be stable across runs and processes
+_rng = random.Random(0x5EED_C0A1)
+# ZOBRIST[(code & 15) << 6 | sq]; has_moved does not change moves or score, so it is not hashed
+ZOBRIST = tuple(_rng.getrandbits(64) for _ in range(16 * 64))
+ZOBRIST_SIDE = _rng.getrandbits(64)
+del _rng
+
+# evaluation table used when a Position is built without one (move generation only)
+NO_EVAL = (0,) * (16 * 64)
+
+
+# ---------------------- FEN ----------------------
+START_FEN = "rnbqkbnr/pppppppp/8/8/8/8/PPPPPPPP/RNBQKBNR w - - 0 1"
+FEN_PIECES = {"p": PAWN, "r": ROOK, "n": KNIGHT, "b": BISHOP, "q": QUEEN, "k": KING}
+FEN_LETTERS = {v: k for k, v in FEN_PIECES.items()}
+# where each piece type starts, per color; a piece elsewhere is taken to have moved
+_HOME_ROWS = {WHITE: (6, 7), BLACK: (1, 0)}
+
+
+def _home(ptype, color, sq):
+    pawn_row, back_row = _HOME_ROWS[color]
+    row, col = sq >> 3, sq & 7
+    if ptype == PAWN:
+        return row == pawn_row
+    return row == back_row and col in {ROOK: (0, 7), KNIGHT: (1, 6), BISHOP: (2, 5), QUEEN: (3,), KING: (4,)}[ptype]
+
+
+def parse_fen(fen):
+    """
+    FEN -> (squares, side). Castling and en passant fields are accepted and
+    ignored: the game has neither rule. has_moved is inferred from whether a
+    piece stands on its starting square.
+    """
+    fields = fen.split()
+    if not fields:
+        raise ValueError("empty FEN")
+    rows = fields[0].split("/")
+    if len(rows) != 8:
+        raise ValueError(f"FEN needs 8 ranks: {fen!r}")
+    squares = [EMPTY] * 64
+    for r, text in enumerate(rows):
+        c = 0
+        for ch in text:
+            if ch.isdigit():
+                c += int(ch)
+                continue
+            ptype = FEN_PIECES.get(ch.lower())
+            if ptype is None or c > 7:
+                raise ValueError(f"bad FEN rank {text!r}")
+            color = WHITE if ch.isupper() else BLACK
+            sq = r * 8 + c
+            squares[sq] = make_piece(ptype, color, not _home(ptype, color, sq))
+            c += 1
+        if c != 8:
+            raise ValueError(f"bad FEN rank {text!r}")
+    side = BLACK if len(fields) > 1 and fields[1] == "b" else WHITE
+    return squares, side
+
+
+def format_fen(squares, side, fullmove=1):
+    rows = []
+    for r in range(8):
+        text = ""
+        empty = 0
+        for c in range(8):
+            p = squares[r * 8 + c]
+            if not p:
+                empty += 1
+                continue
+            if empty:
+                text += str(empty)
+                empty = 0
+            letter = FEN_LETTERS[p & TYPE_MASK]
+            text += letter.upper() if not (p & BLACK_BIT) else letter
+        if empty:
+            text += str(empty)
+        rows.append(text)
+    return f"{'/'.join(rows)} {'b' if side == BLACK else 'w'} - - 0 {fullmove}"
+
+
+# ---------------------- POSITION ----------------------
+class Position:
+    def __init__(self, squares=None, side=WHITE, pst=None):
+        """
+        pst is a flat [(code & 15) << 6 | sq] table of piece value plus
+        positional bonus, negative for Black (see ChessAI.build_eval_tables).
+        self.score, the white-relative sum over it, is kept up to date by
+        make/unmake.
+        """
+        self.squares = list(squares) if squares else [EMPTY] * 64
+        self.side = side
+        self.pst = pst or NO_EVAL
+        self.ply = 0
+        # bb[code & 15] is the bitboard of that colored piece type, occ[color] all of a side
+        self.bb = [0] * 16
+        self.occ = [0, 0]
+        for sq, p in enumerate(self.squares):
+            if p:
+                self.bb[p & 15] |= BIT[sq]
+                self.occ[(p >> 3) & 1] |= BIT[sq]
+        self.hash = self.compute_hash()
+        self.score = sum(self.pst[(p & 15) << 6 | sq] for sq, p in enumerate(self.squares) if p)
+        # undo stacks indexed by ply, allocated once
+        self._captured = [EMPTY] * MAX_PLY
+        self._moved = [EMPTY] * MAX_PLY
+        self._hashes = [0] * MAX_PLY
+        self._scores = [0] * MAX_PLY
+
+    @classmethod
+    def from_fen(cls, fen, pst=None):
+        squares, side = parse_fen(fen)
+        return cls(squares, side, pst)
+
+    def fen(self):
+        return format_fen(self.squares, self.side)
+
+    def compute_hash(self):
+        """Zobrist key from scratch; make/unmake keep self.hash up to date incrementally."""
+        h = ZOBRIST_SIDE if self.side == BLACK else 0
+        for sq, p in enumerate(self.squares):
+            if p:
+                h ^= ZOBRIST[(p & 15) << 6 | sq]
+        return h
+
+    def make_move(self, move):
+        """Play move in place. Records the captured piece and the mover's previous code (has_moved flag)."""
+        frm = move & 63
+        to = move >> 6
+        sq = self.squares
+        piece = sq[frm]
+        captured = sq[to]
+        ply = self.ply
+        if ply == len(self._captured):
+            self._captured.extend([EMPTY] * MAX_PLY)
+            self._moved.extend([EMPTY] * MAX_PLY)
+            self._hashes.extend([0] * MAX_PLY)
+            self._scores.extend([0] * MAX_PLY)
+        self._captured[ply] = captured
+        self._moved[ply] = piece
+        self._hashes[ply] = h = self.hash
+        self._scores[ply] = s = self.score
+        code = (piece & 15) << 6
+        h ^= ZOBRIST[code | frm] ^ ZOBRIST[code | to] ^ ZOBRIST_SIDE
+        pst = self.pst
+        s += pst[code | to] - pst[code | frm]
+        sq[to] = piece | MOVED
+        sq[frm] = EMPTY
+        ft = BIT[frm] | BIT[to]
+        self.bb[piece & 15] ^= ft
+        self.occ[self.side] ^= ft
+        if captured:
+            self.bb[captured & 15] ^= BIT[to]
+            self.occ[self.side ^ 1] ^= BIT[to]
+            h ^= ZOBRIST[(captured & 15) << 6 | to]
+            s -= pst[(captured & 15) << 6 | to]
+        self.hash = h
+        self.score = s
+        self.side ^= 1
+        self.ply = ply + 1
+
+    def unmake_move(self, move):
+        """Take back move, which must be the last one made."""
+        ply = self.ply - 1
+        frm = move & 63
+        to = move >> 6
+        sq = self.squares
+        piece = self._moved[ply]
+        captured = self._captured[ply]
+        sq[frm] = piece
+        sq[to] = captured
+        self.side ^= 1
+        ft = BIT[frm] | BIT[to]
+        self.bb[piece & 15] ^= ft
+        self.occ[self.side] ^= ft
+        if captured:
+            self.bb[captured & 15] ^= BIT[to]
+            self.occ[self.side ^ 1] ^= BIT[to]
+        self.hash = self._hashes[ply]
+        self.score = self._scores[ply]
+        self.ply = ply
+
+    def attacked(self, sq, color, occ):
+        """
+        True if color attacks sq, with occ as the blockers. A slider only
+        counts from one of sq's lines with nothing in between.
+        """
+        bb = self.bb
+        base = color << 3
+        if (PAWN_ATTACKS[color ^ 1][sq] & bb[base | PAWN] or KNIGHT_ATTACKS[sq] & bb[base | KNIGHT]
+                or KING_ATTACKS[sq] & bb[base | KING]):
+            return True
+        queens = bb[base | QUEEN]
+        sliders = ((bb[base | ROOK] | queens) & ROOK_LINES[sq]) | ((bb[base | BISHOP] | queens) & BISHOP_LINES[sq])
+        row = sq << 6
+        while sliders:
+            b = sliders & -sliders
+            if not BETWEEN[row | (b.bit_length() - 1)] & occ:
+                return True
+            sliders ^= b
+        return False
+
+    def in_check(self, color):
+        king = self.bb[color << 3 | KING]
+        if not king:
+            return False
+        return self.attacked(king.bit_length() - 1, color ^ 1, self.occ[0] | self.occ[1])
+
+    def generate_moves(self, color, captures_only=False):
+        """
+        Legal moves for color: captures first, then quiet moves. Built
+        from the attack tables, without trying moves. In check, pieces
+        other than the king may only capture the checker or block its ray
+        (double check: only the king moves). A pinned piece stays on the
+        ray between its king and the pinner. The king never steps onto an
+        attacked square; sliders see through it, so it cannot retreat
+        along a checking line. A side without a king gets every pseudo-legal
+        move.
+        """
+        bb = self.bb
+        own = self.occ[color]
+        enemy = self.occ[color ^ 1]
+        occ = own | enemy
+        empty = FULL ^ occ
+        base = color << 3
+        them = base ^ BLACK_BIT
+        king = bb[base | KING]
+        # squares a non-king move may end on, and the ray each pinned piece is held to
+        allowed = FULL
+        pinned = 0
+        pin_rays = None
+        if king:
+            k = king.bit_length() - 1
+            checkers = (PAWN_ATTACKS[color][k] & bb[them | PAWN]) | (KNIGHT_ATTACKS[k] & bb[them | KNIGHT])
+            # enemy sliders on the king's lines: nothing between is a check,
+            # one own piece between is pinned to the ray
+            queens = bb[them | QUEEN]
+            snipers = ((bb[them | ROOK] | queens) & ROOK_LINES[k]) | ((bb[them | BISHOP] | queens) & BISHOP_LINES[k])
+            while snipers:
+                sb = snipers & -snipers
+                snipers ^= sb
+                ray = BETWEEN[k << 6 | (sb.bit_length() - 1)]
+                blockers = ray & occ
+                if not blockers:
+                    checkers |= sb
+                elif not blockers & (blockers - 1) and blockers & own:
+                    pinned |= blockers
+                    if pin_rays is None:
+                        pin_rays = {}
+                    pin_rays[blockers.bit_length() - 1] = ray | sb
+            if checkers:
+                if checkers & (checkers - 1):
+                    allowed = 0
+                else:
+                    allowed = checkers | BETWEEN[k << 6 | (checkers.bit_length() - 1)]
+                # a pinned piece can neither take the checker nor block it
+                own_movable = ~pinned
+            else:
+                own_movable = FULL
+        else:
+            own_movable = FULL
+        capture_targets = enemy & allowed
+        quiet_targets = empty & allowed
+        pawns = bb[base | PAWN] & own_movable & ~pinned
+        # (targets, from = to + offset) per pawn move kind
+        if color == WHITE:
+            single = (pawns >> 8) & empty
+            pawn_captures = ((((pawns & NOT_FILE_A) >> 9) & capture_targets, 9),
+                             (((pawns & NOT_FILE_H) >> 7) & capture_targets, 7))
+            pawn_pushes = ((single & allowed, 8), (((single & ROW_MASK[5]) >> 8) & quiet_targets, 16))
+        else:
+            single = (pawns << 8) & empty
+            pawn_captures = ((((pawns & NOT_FILE_H) << 9) & capture_targets, -9),
+                             (((pawns & NOT_FILE_A) << 7) & capture_targets, -7))
+            pawn_pushes = ((single & allowed, -8), (((single & ROW_MASK[2]) << 8) & quiet_targets, -16))
+
+        captures = []
+        quiets = []
+        for targets, offset in pawn_captures:
+            while targets:
+                b = targets & -targets
+                to = b.bit_length() - 1
+                captures.append((to + offset) | (to << 6))
+                targets ^= b
+        if not captures_only:
+            for targets, offset in pawn_pushes:
+                while targets:
+                    b = targets & -targets
+                    to = b.bit_length() - 1
+                    quiets.append((to + offset) | (to << 6))
+                    targets ^= b
+        if pin_rays and own_movable == FULL:
+            # pinned pawns, one at a time: pushes along a file pin, captures of a diagonal pinner
+            pieces = bb[base | PAWN] & pinned
+            step = -8 if color == WHITE else 8
+            start_row = ROW_MASK[6] if color == WHITE else ROW_MASK[1]
+            while pieces:
+                pb = pieces & -pieces
+                frm = pb.bit_length() - 1
+                pieces ^= pb
+                ray = pin_rays[frm]
+                targets = PAWN_ATTACKS[color][frm] & enemy & ray
+                if targets:
+                    captures.append(frm | ((targets.bit_length() - 1) << 6))
+                if captures_only:
+                    continue
+                to = frm + step
+                if 0 <= to < 64 and empty & BIT[to]:
+                    if ray & BIT[to]:
+                        quiets.append(frm | (to << 6))
+                    if pb & start_row and empty & ray & BIT[to + step]:
+                        quiets.append(frm | ((to + step) << 6))
+        for ptype in (KNIGHT, BISHOP, ROOK, QUEEN):
+            pieces = bb[base | ptype] & own_movable
+            if ptype == KNIGHT:
+                # a pinned knight can never stay on its ray
+                pieces &= ~pinned
+            while pieces:
+                pb = pieces & -pieces
+                frm = pb.bit_length() - 1
+                pieces ^= pb
+                if ptype == KNIGHT:
+                    attacks = KNIGHT_ATTACKS[frm]
+                elif ptype == BISHOP:
+                    attacks = bishop_attacks(frm, occ)
+                elif ptype == ROOK:
+                    attacks = rook_attacks(frm, occ)
+                else:
+                    attacks = rook_attacks(frm, occ) | bishop_attacks(frm, occ)
+                if pb & pinned:
+                    attacks &= pin_rays[frm]
+                targets = attacks & capture_targets
+                while targets:
+                    b = targets & -targets
+                    captures.append(frm | ((b.bit_length() - 1) << 6))
+                    targets ^= b
+                if captures_only:
+                    continue
+                targets = attacks & quiet_targets
+                while targets:
+                    b = targets & -targets
+                    quiets.append(frm | ((b.bit_length() - 1) << 6))
+                    targets ^= b
+        pieces = king
+        while pieces:
+            pb = pieces & -pieces
+            frm = pb.bit_length() - 1
+            pieces ^= pb
+            targets = KING_ATTACKS[frm] & (enemy if captures_only else ~own)
+            # the king is lifted off the board so sliders see through it
+            without_king = occ ^ pb
+            while targets:
+                b = targets & -targets
+                to = b.bit_length() - 1
+                targets ^= b
+                if self.attacked(to, color ^ 1, without_king):
+                    continue
+                (captures if b & enemy else quiets).append(frm | (to << 6))
+        captures.extend(quiets)
+        return captures
+
+
+# ---------------------- PERFT ----------------------
+def perft(pos, depth):
+    """
+    Leaf nodes of the legal move tree to depth (bulk-counted at the last
+    ply). The game has no castling, en passant or promotion, so the
+    standard perft counts apply minus those moves: 20, 400, 8902, 197281,
+    4865351 from the initial position.
+    """
+    moves = pos.generate_moves(pos.side)
+    if depth <= 1:
+        return len(moves) if depth == 1 else 1
+    nodes = 0
+    for mv in moves:
+        pos.make_move(mv)
+        nodes += perft(pos, depth - 1)
+        pos.unmake_move(mv)
+    return nodes
+
+
+def divide(pos, depth):
+    """[(root move, perft(depth - 1) below it)]"""
+    result = []
+    for mv in pos.generate_moves(pos.side):
+        pos.make_move(mv)
+        result.append((mv, perft(pos, depth - 1)))
+        pos.unmake_move(mv)
+    return result
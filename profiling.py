@@ -0,0 +1,135 @@
+"""
+Frame profiler for the game window.
+
+Times the named stages of each frame (draw_board, draw_info, the display
+update, ...) and the frame as a whole. Only the last `window` frames are
+kept, so the percentiles describe what the window is doing now. A
+finished game can be summed up with summary(). Optionally cProfile runs
+inside the first few frames. ui.py draws the overlay; this module does
+no display work.
+"""
+import cProfile
+import pstats
+import sys
+import time
+from collections import deque
+
+# frames kept for the percentiles: 10 s at 60 fps
+WINDOW = 600
+# histogram bucket upper edges in ms, doubling; the last bucket takes the rest
+HISTOGRAM_EDGES_MS = tuple(0.0625 * 2 ** i for i in range(11))
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile p (0-100) of an already sorted list; 0.0 when empty."""
+    if not sorted_values:
+        return 0.0
+    rank = max(1, -(-len(sorted_values) * p // 100))
+    return sorted_values[int(rank) - 1]
+
+
+class _Stage:
+    __slots__ = ("profiler", "name", "start")
+
+    def __init__(self, profiler, name):
+        self.profiler = profiler
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.profiler.add(self.name, time.perf_counter() - self.start)
+        return False
+
+
+class FrameProfiler:
+    def __init__(self, window=WINDOW, cprofile_frames=0, cprofile_out=None):
+        """
+        cprofile_frames > 0 runs cProfile inside that many frames, from the
+        first one, then prints the busiest functions. cprofile_out also
+        saves the raw stats there for pstats or snakeviz.
+        """
+        self.window = window
+        # stage name -> ms, one entry per frame that ran the stage
+        self.stages = {}
+        self.frames = deque(maxlen=window)     # ms spent inside each frame
+        self.intervals = deque(maxlen=window)  # ms from one frame start to the next
+        self.count = 0
+        self._start = None
+        self._cprofile = cProfile.Profile() if cprofile_frames > 0 else None
+        self._cprofile_left = cprofile_frames
+        self._cprofile_out = cprofile_out
+
+    def stage(self, name):
+        """Context manager timing one stage of the current frame."""
+        return _Stage(self, name)
+
+    def add(self, name, seconds):
+        times = self.stages.get(name)
+        if times is None:
+            times = self.stages[name] = deque(maxlen=self.window)
+        times.append(seconds * 1000)
+
+    def begin_frame(self):
+        now = time.perf_counter()
+        if self._start is not None:
+            self.intervals.append((now - self._start) * 1000)
+        self._start = now
+        if self._cprofile_left:
+            self._cprofile.enable()
+
+    def end_frame(self):
+        if self._cprofile_left:
+            self._cprofile.disable()
+            self._cprofile_left -= 1
+            if not self._cprofile_left:
+                self.print_cprofile()
+        self.frames.append((time.perf_counter() - self._start) * 1000)
+        self.count += 1
+
+    def print_cprofile(self, limit=25, out=sys.stdout):
+        """The cProfile run so far, busiest functions first."""
+        if self._cprofile_out:
+            self._cprofile.dump_stats(self._cprofile_out)
+            print(f"cProfile stats written to {self._cprofile_out}", file=out)
+        pstats.Stats(self._cprofile, stream=out).sort_stats("cumulative").print_stats(limit)
+
+    def finish(self, out=sys.stdout):
+        """Print the summary, and the cProfile report if the run ended before its last frame."""
+        if self._cprofile_left and self.count:
+            self._cprofile_left = 0
+            self.print_cprofile(out=out)
+        print("\n".join(self.summary()), file=out)
+
+    def rows(self):
+        """(name, frames, mean, p50, p95, p99, max) in ms: the frame, the frame interval, then each stage."""
+        rows = []
+        series = [("frame", self.frames), ("interval", self.intervals)]
+        series += sorted(self.stages.items(), key=lambda item: -sum(item[1]))
+        for name, times in series:
+            values = sorted(times)
+            if not values:
+                continue
+            rows.append((name, len(values), sum(values) / len(values), percentile(values, 50),
+                         percentile(values, 95), percentile(values, 99), values[-1]))
+        return rows
+
+    def histogram(self):
+        """Frame counts per HISTOGRAM_EDGES_MS bucket, plus one for longer frames."""
+        counts = [0] * (len(HISTOGRAM_EDGES_MS) + 1)
+        for ms in self.frames:
+            i = 0
+            while i < len(HISTOGRAM_EDGES_MS) and ms > HISTOGRAM_EDGES_MS[i]:
+                i += 1
+            counts[i] += 1
+        return counts
+
+    def summary(self):
+        """The rows() table as text lines."""
+        lines = [f"Frame profile, last {len(self.frames)} of {self.count} frames (ms)",
+                 f"{'stage':<16}{'frames':>7}{'mean':>9}{'p50':>9}{'p95':>9}{'p99':>9}{'max':>9}"]
+        for name, n, mean, p50, p95, p99, top in self.rows():
+            lines.append(f"{name:<16}{n:>7}{mean:>9.3f}{p50:>9.3f}{p95:>9.3f}{p99:>9.3f}{top:>9.3f}")
+        return lines
@@ -0,0 +1,147 @@
+"""
+Headless engine-vs-engine matches for tuning the evaluation.
+
+Two engine settings, A and B, play each opening twice with colours
+swapped, spread over a process pool. Each finished game is written as
+one JSON line (result, reason, move list) as soon as it comes back, and
+the match score is reported with a 95% confidence interval.
+"""
+import json
+import math
+import multiprocessing
+import time
+
+import position
+from board import PieceType, PieceColor
+from engine import ChessAI
+
+# a game still running after this many plies is scored a draw
+MAX_GAME_PLIES = 300
+
+
+def parse_values(text):
+    """'knight=300,bishop=340' -> {PieceType.KNIGHT: 300, PieceType.BISHOP: 340}"""
+    values = {}
+    for item in filter(None, (s.strip() for s in text.split(","))):
+        name, _, value = item.partition("=")
+        try:
+            values[PieceType[name.strip().upper()]] = int(value)
+        except (KeyError, ValueError):
+            raise ValueError(f"bad piece value {item!r}; expected name=number, e.g. knight=300")
+    return values
+
+
+def make_engine(settings, color):
+    """
+    ChessAI for one side of a game. settings: depth, time_ms (a time
+    budget, overrides depth), values ({PieceType: value} overrides),
+    hash_mb. The book is off so the opening list decides the openings.
+    """
+    ai = ChessAI(color, depth=settings.get("depth", 3), time_budget_ms=settings.get("time_ms"),
+                 hash_mb=settings.get("hash_mb", 8), book_path=None)
+    if settings.get("values"):
+        ai.piece_values.update(settings["values"])
+        ai.build_eval_tables()
+    return ai
+
+
+def play_game(task):
+    """
+    One game from a pool task (game_id, opening, white_settings,
+    black_settings, max_plies); opening is a list of coordinate moves.
+    Returns a result dict. The game ends in checkmate, or is drawn by
+    stalemate, when only the kings are left, or at max_plies.
+    """
+    game_id, opening, white, black, max_plies = task
+    start = time.perf_counter()
+    engines = (make_engine(white, PieceColor.WHITE), make_engine(black, PieceColor.BLACK))
+    state = position.Position.from_fen(position.START_FEN)
+    moves = []
+    for text in opening:
+        mv = position.uci_to_move(text)
+        if mv not in state.generate_moves(state.side):
+            raise ValueError(f"opening move {text} is not possible in {state.fen()}")
+        state.make_move(mv)
+        moves.append(text)
+    result, reason = "1/2-1/2", "ply limit"
+    while len(moves) < max_plies:
+        ai = engines[state.side]
+        # each engine searches with its own evaluation tables
+        mv = ai.choose_move(position.Position(state.squares, state.side, ai.pst))
+        if mv is None:
+            result, reason = "1/2-1/2", "no moves"
+            break
+        state.make_move(mv)
+        moves.append(position.move_to_uci(mv))
+        if not state.generate_moves(state.side):
+            if state.in_check(state.side):
+                result = "1-0" if state.side == position.BLACK else "0-1"
+                reason = "checkmate"
+            else:
+                result, reason = "1/2-1/2", "stalemate"
+            break
+        if (state.occ[0] | state.occ[1]).bit_count() == 2:
+            result, reason = "1/2-1/2", "bare kings"
+            break
+    return {
+        "game": game_id,
+        "opening": " ".join(opening),
+        "result": result,
+        "reason": reason,
+        "plies": len(moves),
+        "seconds": round(time.perf_counter() - start, 3),
+        "moves": " ".join(moves),
+    }
+
+
+def match_score(wins, draws, losses):
+    """
+    (score, margin, elo, elo_margin) for one side: score is the points
+    fraction, margin the 95% confidence half-width from the per-game
+    variance, elo the rating difference the score implies.
+    """
+    n = wins + draws + losses
+    if not n:
+        return 0.5, 0.0, 0.0, 0.0
+    score = (wins + 0.5 * draws) / n
+    var = (wins * (1 - score) ** 2 + draws * (0.5 - score) ** 2 + losses * score ** 2) / n
+    margin = 1.96 * math.sqrt(var / n)
+
+    def elo(s):
+        s = min(max(s, 1e-6), 1 - 1e-6)
+        return 400 * math.log10(s / (1 - s))
+
+    return score, margin, elo(score), (elo(score + margin) - elo(score - margin)) / 2
+
+
+def run_match(games, openings, settings_a, settings_b, workers, out, max_plies=MAX_GAME_PLIES):
+    """
+    Play `games` games, A white in even games and Black in odd ones, game
+    i using opening i // 2 (cycling). Writes each finished game to out as a
+    JSON line, prints a progress line per game and returns
+    (wins, draws, losses) from A's side.
+    """
+    tasks = []
+    for i in range(games):
+        opening = openings[(i // 2) % len(openings)] if openings else []
+        white, black = (settings_a, settings_b) if i % 2 == 0 else (settings_b, settings_a)
+        tasks.append((i, opening, white, black, max_plies))
+    wins = draws = losses = 0
+    start = time.perf_counter()
+    ctx = multiprocessing.get_context("spawn")
+    with ctx.Pool(workers) as pool:
+        for done, game in enumerate(pool.imap_unordered(play_game, tasks), 1):
+            a_white = game["game"] % 2 == 0
+            game["a"] = "white" if a_white else "black"
+            out.write(json.dumps(game) + "\n")
+            out.flush()
+            if game["result"] == "1/2-1/2":
+                draws += 1
+            elif (game["result"] == "1-0") == a_white:
+                wins += 1
+            else:
+                losses += 1
+            elapsed = time.perf_counter() - start
+            print(f"game {done}/{games}: {game['result']:<7} ({game['reason']}, {game['plies']} plies)  "
+                  f"A +{wins} ={draws} -{losses}  {done / elapsed:.2f} games/s", flush=True)
+    return wins, draws, losses
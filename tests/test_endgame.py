@@ -0,0 +1,71 @@
+"""Endgame tables: solved distances, the mirrored probe, and a conversion played from the table."""
+import pytest
+
+import endgame
+from position import Position, ROOK, QUEEN
+
+
+@pytest.fixture(scope="module")
+def tables(tmp_path_factory):
+    """KRK and KQK, generated once for the module; KPK is all draws and left out."""
+    directory = tmp_path_factory.mktemp("tables")
+    summaries = {}
+    for name in ("krk", "kqk"):
+        ptype = endgame.ENDINGS[name]
+        table = endgame.generate_table(ptype)
+        endgame.write_table(endgame.table_path(name, str(directory)), ptype, table)
+        summaries[ptype] = endgame.table_summary(table)
+    probe = endgame.EndgameTables(str(directory))
+    yield probe, summaries
+    probe.close()
+
+
+@pytest.mark.parametrize("ptype, longest", [(ROOK, 31), (QUEEN, 19)])
+def test_longest_mate(tables, ptype, longest):
+    _, summaries = tables
+    assert summaries[ptype]["longest_mate"] == longest
+
+
+def mirror_fen(fen):
+    """The same position with the colours swapped and the board flipped top to bottom."""
+    board, side = fen.split()[:2]
+    rows = [row.swapcase() for row in reversed(board.split("/"))]
+    return f"{'/'.join(rows)} {'b' if side == 'w' else 'w'} - - 0 1"
+
+
+@pytest.mark.parametrize("fen", [
+    "8/8/8/4k3/8/8/8/R3K3 w - - 0 1",
+    "8/8/8/4k3/8/8/8/R3K3 b - - 0 1",
+    "7k/8/5K2/8/8/8/8/Q7 w - - 0 1",
+    "3k4/8/3K4/8/8/8/8/7R w - - 0 1",
+])
+def test_mirrored_probe(tables, fen):
+    probe, _ = tables
+    white = Position.from_fen(fen)
+    black = Position.from_fen(mirror_fen(fen))
+    move, plies = probe.probe(white)
+    black_move, black_plies = probe.probe(black)
+    assert black_plies == plies
+    # equally good moves may differ, but must leave the same distance
+    white.make_move(move)
+    black.make_move(black_move)
+    after_white, after_black = probe.probe(white), probe.probe(black)
+    assert (after_white is None) == (after_black is None)
+    if after_white:
+        assert after_white[1] == after_black[1]
+
+
+def test_krk_conversion_mates_within_table_distance(tables):
+    probe, _ = tables
+    state = Position.from_fen("8/8/8/4k3/8/8/8/R3K3 w - - 0 1")
+    _, plies = probe.probe(state)
+    assert plies > 0
+    for played in range(1, plies + 1):
+        move, left = probe.probe(state)
+        # the distance to mate counts down by one every ply
+        assert abs(left) == plies - played + 1
+        state.make_move(move)
+        if not state.generate_moves(state.side):
+            break
+    assert played == plies
+    assert state.in_check(state.side) and not state.generate_moves(state.side)
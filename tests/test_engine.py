@@ -0,0 +1,66 @@
+"""ChessAI evaluation: the incrementally kept Position score against a full recount."""
+import random
+
+import pytest
+
+import position
+from board import Board, PieceColor, PieceType
+from engine import ChessAI, move_ordering_report
+
+FENS = [
+    position.START_FEN,
+    "r1bqkb1r/pppp1ppp/2n2n2/4p3/2B1P3/5N2/PPPP1PPP/RNBQK2R w - - 4 4",
+    "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1",
+    "4k3/8/3q4/8/2N1B3/8/3PPP2/4K2R b - - 0 1",
+]
+
+
+def make_ai(color, values=None):
+    ai = ChessAI(color, hash_mb=1, book_path=None, tables_dir=None)
+    if values:
+        ai.piece_values.update(values)
+        ai.build_eval_tables()
+    return ai
+
+
+def check_score(state, white_ai, black_ai):
+    pst = white_ai.pst
+    assert state.score == sum(pst[(p & 15) << 6 | sq] for sq, p in enumerate(state.squares) if p)
+    board = Board()
+    board.set_fen(state.fen())
+    assert white_ai.evaluate_board(board) == state.score
+    assert black_ai.evaluate_board(board) == -state.score
+    assert white_ai.evaluate_state(state) == state.score
+    assert black_ai.evaluate_state(state) == -state.score
+
+
+@pytest.mark.parametrize("values", [None, {PieceType.KNIGHT: 310, PieceType.QUEEN: 950}])
+@pytest.mark.parametrize("fen", FENS)
+def test_incremental_score_matches_evaluate_board(fen, values):
+    white_ai = make_ai(PieceColor.WHITE, values)
+    black_ai = make_ai(PieceColor.BLACK, values)
+    rng = random.Random(fen)
+    state = position.Position.from_fen(fen, white_ai.pst)
+    root_score = state.score
+    for _ in range(20):
+        # a random line down and all the way back, checking every position on it
+        line = []
+        for _ in range(rng.randint(1, 12)):
+            moves = state.generate_moves(state.side)
+            if not moves:
+                break
+            mv = rng.choice(moves)
+            state.make_move(mv)
+            line.append(mv)
+            check_score(state, white_ai, black_ai)
+        for mv in reversed(line):
+            state.unmake_move(mv)
+            check_score(state, white_ai, black_ai)
+        assert state.score == root_score
+
+
+def test_move_ordering_report_searches_book_positions():
+    # the initial position is in the opening book, which the report must not use
+    report = move_ordering_report(Board(), PieceColor.WHITE, 3)
+    assert report["plain"] > report["ordered"] > 0
+    assert 0 < report["reduction"] < 1
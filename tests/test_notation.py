@@ -0,0 +1,108 @@
+"""SAN, FEN, PGN and EPD: each written form reads back to the same thing."""
+import io
+import random
+
+import pytest
+
+import notation
+import position
+from board import Board
+from position import Position, START_FEN
+
+
+def random_game(seed, plies=80, fen=None):
+    """A Board after up to `plies` random legal moves."""
+    rng = random.Random(seed)
+    board = Board()
+    if fen:
+        board.set_fen(fen)
+    for _ in range(plies):
+        if board.game_over:
+            break
+        moves = board.position.generate_moves(board.position.side)
+        frm, to = position.decode_move(rng.choice(moves))
+        board.play_move(*frm, *to)
+    return board
+
+
+@pytest.mark.parametrize("seed", range(8))
+def test_san_round_trip(seed):
+    rng = random.Random(seed)
+    state = Position.from_fen(START_FEN)
+    for _ in range(100):
+        moves = state.generate_moves(state.side)
+        if not moves:
+            break
+        for mv in moves:
+            san = notation.move_to_san(state, mv)
+            assert notation.parse_san(state, san) == mv, (state.fen(), san)
+        state.make_move(rng.choice(moves))
+
+
+def test_san_marks():
+    state = Position.from_fen("6k1/5ppp/8/8/8/8/8/R5K1 w - - 0 1")
+    assert notation.move_to_san(state, position.uci_to_move("a1a8")) == "Ra8#"
+    state = Position.from_fen("4k3/8/8/8/8/8/8/R3K3 w - - 0 1")
+    assert notation.move_to_san(state, position.uci_to_move("a1a8")) == "Ra8+"
+    # two rooks on one rank: the file tells them apart
+    state = Position.from_fen("4k3/8/8/8/8/8/4K3/R6R w - - 0 1")
+    assert notation.move_to_san(state, position.uci_to_move("a1d1")) == "Rad1"
+    with pytest.raises(ValueError):
+        notation.parse_san(state, "Rf1d1")
+    with pytest.raises(ValueError):
+        notation.parse_san(state, "O-O")
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_set_fen_round_trip(seed):
+    board = random_game(seed, plies=seed * 15 + 1)
+    fen = board.fen()
+    copy = Board()
+    copy.set_fen(fen)
+    assert copy.fen() == fen
+    # FEN has no has_moved flag: a piece back on its home square reads as unmoved
+    assert [p & 15 for p in copy.position.squares] == [p & 15 for p in board.position.squares]
+    assert copy.turn == board.turn
+    assert copy.position.hash == board.position.hash
+
+
+@pytest.mark.parametrize("seed, fen", [
+    (1, None),
+    (2, None),
+    (3, "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R b - - 0 7"),
+])
+def test_pgn_export_reads_back(seed, fen):
+    board = random_game(seed, plies=120, fen=fen)
+    text = notation.export_pgn(board, {"Event": "Test match"})
+    games = list(notation.read_pgn(io.StringIO(text + "\n" + text)))
+    assert len(games) == 2
+    game = games[0]
+    assert game.headers["Event"] == "Test match"
+    assert game.result == notation.game_result(board)
+    if fen:
+        assert game.headers["FEN"] == board.start_fen
+    played = [position.decode_move(mv) for _, mv in game.replay()]
+    assert played == [tuple(m) for m in board.move_history]
+
+
+def test_read_pgn_skips_comments_and_variations():
+    text = '[Event "x"]\n\n1. e4 {best by test} e5 (1... c5 2. Nf3) 2. Nf3 $1 ; a comment\nNc6 1-0\n'
+    (game,) = notation.read_pgn(io.StringIO(text))
+    assert game.moves == ["e4", "e5", "Nf3", "Nc6"]
+    assert game.result == "1-0"
+
+
+def test_read_epd():
+    lines = [
+        "# a comment, then a blank line",
+        "",
+        'r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - bm Bb5 Bc4; id "Test; one"; hmvc 2; fmvn 3;',
+    ]
+    ((fen, ops),) = notation.read_epd(lines)
+    assert fen == "r1bqkbnr/pppp1ppp/2n5/4p3/4P3/5N2/PPPP1PPP/RNBQKB1R w KQkq - 2 3"
+    assert ops["id"] == ["Test; one"]
+    assert ops["bm"] == ["Bb5", "Bc4"]
+    state = Position.from_fen(fen)
+    assert {position.move_to_uci(notation.parse_san(state, san)) for san in ops["bm"]} == {"f1b5", "f1c4"}
+    with pytest.raises(ValueError):
+        list(notation.read_epd(["8/8/8 w"]))
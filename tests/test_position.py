@@ -0,0 +1,200 @@
+"""Move generation on position.Position: perft counts and exact move lists."""
+import random
+
+import pytest
+
+import position
+from position import Position, START_FEN
+
+# standard perft position 3; without en passant its depth-3 count is 2810, not 2812
+POSITION_3 = "8/2p5/3p4/KP5r/1R3p1k/8/4P1P1/8 w - - 0 1"
+# "Kiwipete" without castling rights: pins, checks and captures within a few plies
+SHARP = "r3k2r/p1ppqpb1/bn2pnp1/3PN3/1p2P3/2N2Q1p/PPPBBPPP/R3K2R w - - 0 1"
+
+
+def uci_moves(state, captures_only=False):
+    return sorted(position.move_to_uci(m) for m in state.generate_moves(state.side, captures_only))
+
+
+@pytest.mark.parametrize("fen, depth, nodes", [
+    (START_FEN, 1, 20),
+    (START_FEN, 2, 400),
+    (START_FEN, 3, 8902),
+    (START_FEN, 4, 197281),
+    (POSITION_3, 1, 14),
+    (POSITION_3, 2, 191),
+    (POSITION_3, 3, 2810),
+])
+def test_perft(fen, depth, nodes):
+    assert position.perft(Position.from_fen(fen), depth) == nodes
+
+
+def test_perft_leaves_position_unchanged():
+    state = Position.from_fen(POSITION_3)
+    before = (list(state.squares), list(state.bb), list(state.occ), state.hash, state.side)
+    position.perft(state, 3)
+    assert (state.squares, state.bb, state.occ, state.hash, state.side) == before
+
+
+def test_divide_sums_to_perft():
+    state = Position.from_fen(START_FEN)
+    assert sum(n for _, n in position.divide(state, 3)) == 8902
+
+
+@pytest.mark.parametrize("fen, moves", [
+    (START_FEN, ["a2a3", "a2a4", "b1a3", "b1c3", "b2b3", "b2b4", "c2c3", "c2c4", "d2d3", "d2d4",
+                 "e2e3", "e2e4", "f2f3", "f2f4", "g1f3", "g1h3", "g2g3", "g2g4", "h2h3", "h2h4"]),
+    ("4k3/8/8/3p4/4P3/8/8/4K3 w - - 0 1", ["e1d1", "e1d2", "e1e2", "e1f1", "e1f2", "e4d5", "e4e5"]),
+    # the rook stops on its own pawn and on the enemy pawn it takes
+    ("4k3/8/8/8/1p1R2P1/8/8/K7 w - - 0 1", ["a1a2", "a1b1", "a1b2", "d4b4", "d4c4", "d4d1", "d4d2",
+                                             "d4d3", "d4d5", "d4d6", "d4d7", "d4d8", "d4e4", "d4f4", "g4g5"]),
+    # Black pawns move down the board; the blocked one cannot push at all
+    ("4k3/p7/1P6/4p3/4P3/8/8/4K3 b - - 0 1", ["a7a5", "a7a6", "a7b6", "e8d7", "e8d8", "e8e7", "e8f7",
+                                               "e8f8"]),
+])
+def test_move_list(fen, moves):
+    assert uci_moves(Position.from_fen(fen)) == moves
+
+
+def test_captures_only():
+    state = Position.from_fen("4k3/8/8/8/1p1R2P1/8/8/K7 w - - 0 1")
+    assert uci_moves(state, captures_only=True) == ["d4b4"]
+    # captures come first in the full list
+    moves = state.generate_moves(state.side)
+    assert position.move_to_uci(moves[0]) == "d4b4"
+
+
+# ---------------------- LEGALITY ----------------------
+# a plain square-by-square generator, independent of the attack tables
+STEPS = {
+    position.KNIGHT: ((-2, -1), (-2, 1), (-1, -2), (-1, 2), (1, -2), (1, 2), (2, -1), (2, 1)),
+    position.KING: position.KING_DELTAS,
+}
+RAYS = {
+    position.ROOK: ((-1, 0), (1, 0), (0, -1), (0, 1)),
+    position.BISHOP: ((-1, -1), (-1, 1), (1, -1), (1, 1)),
+}
+RAYS[position.QUEEN] = RAYS[position.ROOK] + RAYS[position.BISHOP]
+
+
+def pseudo_legal(squares, color):
+    moves = []
+    for frm, p in enumerate(squares):
+        if not p or position.piece_color(p) != color:
+            continue
+        r, c = divmod(frm, 8)
+        ptype = p & position.TYPE_MASK
+        targets = []
+        if ptype == position.PAWN:
+            dr = -1 if color == position.WHITE else 1
+            if 0 <= r + dr < 8 and not squares[(r + dr) * 8 + c]:
+                targets.append((r + dr, c))
+                if r == (6 if color == position.WHITE else 1) and not squares[(r + 2 * dr) * 8 + c]:
+                    targets.append((r + 2 * dr, c))
+            for dc in (-1, 1):
+                tr, tc = r + dr, c + dc
+                if 0 <= tr < 8 and 0 <= tc < 8:
+                    q = squares[tr * 8 + tc]
+                    if q and position.piece_color(q) != color:
+                        targets.append((tr, tc))
+        elif ptype in STEPS:
+            for dr, dc in STEPS[ptype]:
+                tr, tc = r + dr, c + dc
+                if 0 <= tr < 8 and 0 <= tc < 8:
+                    q = squares[tr * 8 + tc]
+                    if not q or position.piece_color(q) != color:
+                        targets.append((tr, tc))
+        else:
+            for dr, dc in RAYS[ptype]:
+                tr, tc = r + dr, c + dc
+                while 0 <= tr < 8 and 0 <= tc < 8:
+                    q = squares[tr * 8 + tc]
+                    if q and position.piece_color(q) == color:
+                        break
+                    targets.append((tr, tc))
+                    if q:
+                        break
+                    tr, tc = tr + dr, tc + dc
+        moves.extend(frm | (tr * 8 + tc) << 6 for tr, tc in targets)
+    return moves
+
+
+def king_attacked(squares, color):
+    """True if color's king could be taken by a pseudo-legal enemy move."""
+    king = next(sq for sq, p in enumerate(squares) if p and p & 15 == (color << 3 | position.KING))
+    return any(m >> 6 == king for m in pseudo_legal(squares, color ^ 1))
+
+
+def gives_check(state, move):
+    state.make_move(move)
+    check = state.in_check(state.side)
+    state.unmake_move(move)
+    return check
+
+
+def reference_moves(state):
+    """Pseudo-legal moves filtered by make / in_check / unmake."""
+    color = state.side
+    legal = []
+    for mv in pseudo_legal(state.squares, color):
+        state.make_move(mv)
+        in_check = state.in_check(color)
+        assert in_check == king_attacked(state.squares, color), (state.fen(), position.move_to_uci(mv))
+        if not in_check:
+            legal.append(mv)
+        state.unmake_move(mv)
+    return sorted(legal)
+
+
+@pytest.mark.parametrize("fen, moves", [
+    # pawn pinned along its file: both pushes stay on the pin ray
+    ("4r2k/8/8/8/8/8/4P3/4K3 w - - 0 1", ["e1d1", "e1d2", "e1f1", "e1f2", "e2e3", "e2e4"]),
+    # pawn pinned on a diagonal: it may take the pinner, not the knight or push
+    ("7k/8/8/8/8/4n1b1/5P2/4K3 w - - 0 1", ["e1d2", "e1e2", "f2g3"]),
+    # pawn pinned along its rank cannot push
+    ("8/8/8/r2PK3/8/8/8/7k w - - 0 1", ["e5d4", "e5d6", "e5e4", "e5e6", "e5f4", "e5f5", "e5f6"]),
+    # a pinned knight has no moves at all
+    ("4r2k/8/8/8/8/8/4N3/4K3 w - - 0 1", ["e1d1", "e1d2", "e1f1", "e1f2"]),
+    # in check on the file, the bishop pinned on the diagonal may not block on e3
+    ("4r2k/8/8/8/1b6/8/3B4/4K3 w - - 0 1", ["e1d1", "e1f1", "e1f2"]),
+    # double check from rook and knight: only the king moves, off the rook's file
+    ("4r2k/8/8/8/8/3n4/8/R3K2Q w - - 0 1", ["e1d1", "e1d2", "e1f1"]),
+    # check evasion: take or block the checker; the king cannot back away along the file
+    ("4r2k/2N5/8/8/8/4K3/8/8 w - - 0 1", ["c7e6", "c7e8", "e3d2", "e3d3", "e3d4", "e3f2", "e3f3", "e3f4"]),
+    # a double push that blocks a check along the rank
+    ("7k/8/8/8/r6K/8/2P5/8 w - - 0 1", ["c2c4", "h4g3", "h4g5", "h4h3", "h4h5"]),
+    # in check from a Black pawn, which attacks downwards: f1 is safe, the pawn can be taken
+    ("8/8/8/8/8/8/5p2/4K2k w - - 0 1", ["e1d1", "e1d2", "e1e2", "e1f1", "e1f2"]),
+])
+def test_legal_move_list(fen, moves):
+    state = Position.from_fen(fen)
+    assert uci_moves(state) == moves
+    assert sorted(state.generate_moves(state.side)) == reference_moves(state)
+
+
+@pytest.mark.parametrize("fen, mated", [
+    ("R5k1/5ppp/8/8/8/8/8/6K1 b - - 0 1", True),
+    ("7k/5Q2/6K1/8/8/8/8/8 b - - 0 1", False),
+])
+def test_no_moves_left(fen, mated):
+    """Back-rank mate and stalemate: no legal moves, in check only when mated."""
+    state = Position.from_fen(fen)
+    assert state.generate_moves(state.side) == []
+    assert state.in_check(state.side) == mated
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("fen", [START_FEN, POSITION_3, SHARP])
+def test_legal_moves_match_reference(fen, seed):
+    rng = random.Random(seed)
+    state = Position.from_fen(fen)
+    for _ in range(100):
+        moves = state.generate_moves(state.side)
+        assert sorted(moves) == reference_moves(state), state.fen()
+        captures = state.generate_moves(state.side, captures_only=True)
+        assert sorted(captures) == sorted(m for m in moves if state.squares[m >> 6]), state.fen()
+        if not moves:
+            break
+        # favour checks, then captures, to reach pins and evasions sooner
+        sample = rng.sample(moves, min(6, len(moves)))
+        state.make_move(max(sample, key=lambda m: 2 * gives_check(state, m) + bool(state.squares[m >> 6])))
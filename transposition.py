@@ -0,0 +1,107 @@
+"""
+Fixed-size transposition table for ChessAI.
+
+Entries live in two flat unsigned 64-bit arrays (key, packed data), so the
+table takes exactly 16 bytes per slot and never grows during a search.
+Slot index is the low bits of the Zobrist key.
+
+Replacement policy (one slot per index): a store always overwrites an entry
+for the same position, an empty slot, or an entry left over from an earlier
+search. Otherwise the incoming entry replaces the stored one only if it was
+searched at least as deep (depth-preferred).
+"""
+from array import array
+
+EXACT, LOWER, UPPER = 0, 1, 2
+
+ENTRY_BYTES = 16
+_SCORE_OFFSET = 1 << 31
+
+
+class TranspositionTable:
+    def __init__(self, size_mb=16):
+        # largest power of two slot count that fits the budget
+        slots = max(1, (int(size_mb * 1024 * 1024) // ENTRY_BYTES))
+        self.size = 1 << (slots.bit_length() - 1)
+        self.mask = self.size - 1
+        self.keys = array('Q', bytes(8 * self.size))
+        self.data = array('Q', bytes(8 * self.size))
+        self.generation = 0
+        self.reset_counters()
+
+    def __getstate__(self):
+        # pickles as an empty table of the same size (process pool workers)
+        return {"size": self.size}
+
+    def __setstate__(self, state):
+        self.size = state["size"]
+        self.mask = self.size - 1
+        self.clear()
+
+    @property
+    def size_mb(self):
+        return self.size * ENTRY_BYTES / (1024 * 1024)
+
+    def reset_counters(self):
+        self.probes = 0
+        self.hits = 0
+        self.collisions = 0   # slot held a different position on probe
+        self.stores = 0
+        self.overwrites = 0   # a different position was evicted
+        self.rejected = 0     # store skipped by the depth-preferred rule
+
+    def clear(self):
+        self.keys = array('Q', bytes(8 * self.size))
+        self.data = array('Q', bytes(8 * self.size))
+        self.generation = 0
+        self.reset_counters()
+
+    def new_search(self):
+        """Call once per root search so older entries become replaceable."""
+        self.generation = (self.generation + 1) & 0xFF
+
+    def probe(self, key):
+        """(depth, score, bound, move) for key, or None."""
+        self.probes += 1
+        i = key & self.mask
+        stored = self.keys[i]
+        if stored != key:
+            if stored:
+                self.collisions += 1
+            return None
+        self.hits += 1
+        d = self.data[i]
+        return ((d >> 32) & 0xFF, (d & 0xFFFFFFFF) - _SCORE_OFFSET, (d >> 40) & 3, (d >> 42) & 0xFFF)
+
+    def store(self, key, depth, score, bound, move):
+        i = key & self.mask
+        stored = self.keys[i]
+        if stored and stored != key:
+            d = self.data[i]
+            if (d >> 54) == self.generation and ((d >> 32) & 0xFF) > depth:
+                self.rejected += 1
+                return
+            self.overwrites += 1
+        self.stores += 1
+        self.keys[i] = key
+        self.data[i] = ((score + _SCORE_OFFSET) | (depth << 32) | (bound << 40)
+                        | ((move or 0) << 42) | (self.generation << 54))
+
+    def usage(self):
+        """Fraction of slots in use (first 1000 slots are sampled)."""
+        n = min(self.size, 1000)
+        return sum(1 for i in range(n) if self.keys[i]) / n
+
+    def stats(self):
+        return {
+            "size_mb": round(self.size_mb, 2),
+            "slots": self.size,
+            "probes": self.probes,
+            "hits": self.hits,
+            "hit_rate": self.hits / self.probes if self.probes else 0.0,
+            "collisions": self.collisions,
+            "stores": self.stores,
+            "overwrites": self.overwrites,
+            "rejected": self.rejected,
+            "usage": self.usage(),
+        }
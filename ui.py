@@ -0,0 +1,778 @@
+"""
+The pygame window: layout, drawing, input and the frame loop. Only
+main() opens the display; run the game with `python chess.py`.
+"""
+import pygame
+import sys
+import os
+import math
+import hashlib
+import contextlib
+from collections import OrderedDict
+
+from board import PieceType, PieceColor, Board
+from engine import ChessAI, AIWorker
+from profiling import FrameProfiler, HISTOGRAM_EDGES_MS
+
+# ---------------------- INIT ----------------------
+os.environ['SDL_VIDEO_CENTERED'] = '1' 
+
+SCREEN_W, SCREEN_H = 1000, 800
+# created by init_display(), so headless commands never open a window
+screen = None
+clock = None
+# frame pacing: FPS while something moves (a sliding piece, the thinking
+# spinner), PULSE_FPS while only the selection pulses, IDLE_FPS otherwise;
+# IDLE_FPS 0 blocks until the next input event
+FPS = 60
+PULSE_FPS = 10
+IDLE_FPS = 20
+AI_TIME_MS = 1500
+# search processes for the AI; 1 searches on the game's own worker thread only.
+# The root-parallel pool is opt-in (chess.py --workers) until it shows a speedup
+AI_WORKERS = 1
+
+SIDE_PANEL_W = min(360, SCREEN_W // 5)
+TOP_MARGIN = 100
+BOTTOM_MARGIN = 80
+AVAILABLE_W = SCREEN_W - (SIDE_PANEL_W + 80)
+AVAILABLE_H = SCREEN_H - (TOP_MARGIN + BOTTOM_MARGIN)
+SQUARE_SIZE = min(AVAILABLE_H // 8, AVAILABLE_W // 8)
+BOARD_WIDTH = SQUARE_SIZE * 8
+BOARD_HEIGHT = SQUARE_SIZE * 8
+BOARD_X = (SCREEN_W - SIDE_PANEL_W - BOARD_WIDTH) // 2
+BOARD_Y = TOP_MARGIN + (AVAILABLE_H - BOARD_HEIGHT) // 2
+
+
+ICE_LIGHT = (240, 217, 181)  
+ICE_DARK = (181, 136, 99)    
+ACCENT = (200, 60, 60)       
+GOLD = (242, 201, 76)
+WHITE = (255, 255, 255)
+BLACK = (20, 20, 30)        
+SILVER = (120, 120, 140)
+PANEL_BG = (25, 30, 40, 220)
+VALID_MOVE_TINT = (100, 200, 100, 80)   
+LAST_MOVE_TINT = (100, 150, 255, 80)    
+HIGHLIGHT_TINT = (255, 255, 100, 80)    
+CHECK_TINT = (230, 40, 40, 110)
+SHADOW = (0, 0, 0, 60)
+
+TITLE_FONT = HEADER_FONT = NORMAL_FONT = XY_FONT = PROFILE_FONT = None
+
+def init_display():
+    global screen, clock, TITLE_FONT, HEADER_FONT, NORMAL_FONT, XY_FONT, PROFILE_FONT
+    pygame.init()
+    pygame.display.set_caption("Cờ vua")
+    screen = pygame.display.set_mode((SCREEN_W, SCREEN_H))
+    clock = pygame.time.Clock()
+    try:
+        TITLE_FONT = pygame.font.SysFont("segoeui", 44, bold=True)
+        HEADER_FONT = pygame.font.SysFont("segoeui", 22, bold=True)
+        NORMAL_FONT = pygame.font.SysFont("segoeui", 18)
+        XY_FONT = pygame.font.SysFont("segoeui", 30, bold=True)
+        PROFILE_FONT = pygame.font.SysFont("consolas", 14)
+    except:
+        TITLE_FONT = pygame.font.SysFont(None, 44, bold=True)
+        HEADER_FONT = pygame.font.SysFont(None, 22, bold=True)
+        NORMAL_FONT = pygame.font.SysFont(None, 18)
+        XY_FONT = pygame.font.SysFont(None, 30, bold=True)
+        PROFILE_FONT = pygame.font.SysFont(None, 16)
+
+ASSETS_DIR = os.path.join(os.path.dirname(__file__), "assets")
+
+# ---------------------- PIECE IMAGES ----------------------
+piece_images = {}
+use_images = False
+
+PIECE_FILES = [
+    ("white", "pawn"), ("white", "rook"), ("white", "knight"), ("white", "bishop"), ("white", "queen"), ("white", "king"),
+    ("black", "pawn"), ("black", "rook"), ("black", "knight"), ("black", "bishop"), ("black", "queen"), ("black", "king"),
+]
+# pre-scaled atlases, one per square size and set of source files
+ATLAS_DIR = os.path.join(ASSETS_DIR, "cache")
+
+def atlas_path(target):
+    """Cache file for pieces scaled to target px; the name changes whenever a source image does."""
+    h = hashlib.sha1(str(target).encode())
+    for color_name, name in PIECE_FILES:
+        st = os.stat(os.path.join(ASSETS_DIR, f"{color_name}_{name}.png"))
+        h.update(f"{color_name}_{name}:{st.st_mtime_ns}:{st.st_size}".encode())
+    return os.path.join(ATLAS_DIR, f"pieces-{target}-{h.hexdigest()[:16]}.png")
+
+def build_piece_atlas(target):
+    """Scale the 12 piece images to target px and pack them into one 6x2 surface."""
+    atlas = pygame.Surface((target * 6, target * 2), pygame.SRCALPHA)
+    for i, (color_name, name) in enumerate(PIECE_FILES):
+        img = pygame.image.load(os.path.join(ASSETS_DIR, f"{color_name}_{name}.png")).convert_alpha()
+        img = pygame.transform.smoothscale(img, (target, target))
+        # max against the cleared atlas copies the pixels exactly, alpha included
+        atlas.blit(img, ((i % 6) * target, (i // 6) * target), special_flags=pygame.BLEND_RGBA_MAX)
+    return atlas
+
+def load_piece_images(square_size):
+    """
+    Load the piece images as one atlas scaled for square_size, from the
+    on-disk cache when it is current, else by scaling the 12 source images
+    and caching the result. If any image is missing, set use_images=False.
+    """
+    global piece_images, use_images
+    piece_images = {}
+    use_images = False
+    target = square_size - 12
+    try:
+        path = atlas_path(target)
+    except OSError as e:
+        print(f"Piece images not found ({e}); using vector graphics.")
+        return
+    try:
+        if os.path.exists(path):
+            atlas = pygame.image.load(path).convert_alpha()
+            source = "cache"
+        else:
+            atlas = build_piece_atlas(target)
+            source = "assets"
+            try:
+                os.makedirs(ATLAS_DIR, exist_ok=True)
+                for old in os.listdir(ATLAS_DIR):
+                    if old.startswith(f"pieces-{target}-"):
+                        os.remove(os.path.join(ATLAS_DIR, old))
+                pygame.image.save(atlas, path)
+            except OSError as e:
+                # a read-only install still works, it just scales on every start
+                print(f"Could not cache the piece atlas: {e}")
+    except (pygame.error, OSError) as e:
+        print(f"Error loading piece images: {e}; using vector graphics.")
+        return
+    for i, key in enumerate(PIECE_FILES):
+        piece_images[key] = atlas.subsurface(((i % 6) * target, (i // 6) * target, target, target))
+    use_images = True
+    print(f"Piece images loaded from {source} ({target}px)")
+
+# vector pieces rasterized once per (color, type, square size)
+_sprites = {}
+SPRITE_KEY = (255, 0, 255)
+
+def draw_piece(surf, piece, x, y):
+    size = SQUARE_SIZE - 12
+
+    if use_images:
+        key = ("white" if piece.color == PieceColor.WHITE else "black", piece.piece_type.name.lower())
+        img = piece_images.get(key)
+        if img:
+            surf.blit(img, (x + (SQUARE_SIZE - size)//2, y + (SQUARE_SIZE - size)//2))
+            return
+
+    surf.blit(piece_sprite(piece.color, piece.piece_type), (x, y))
+
+def piece_sprite(color, ptype):
+    key = (color, ptype, SQUARE_SIZE)
+    sprite = _sprites.get(key)
+    if sprite is None:
+        # the shapes are drawn in solid colors, so a color key is exact and
+        # RLE blits of it are several times cheaper than per-pixel alpha
+        sprite = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE)).convert()
+        sprite.fill(SPRITE_KEY)
+        draw_vector_piece(sprite, color, ptype, SQUARE_SIZE)
+        sprite.set_colorkey(SPRITE_KEY, pygame.RLEACCEL)
+        _sprites[key] = sprite
+    return sprite
+
+def draw_vector_piece(surf, color, ptype, square_size):
+    """Draw a piece from circles, polygons and lines, into a square_size box at surf's origin."""
+    is_white = (color == PieceColor.WHITE)
+    size = square_size - 12
+
+    cx = square_size // 2
+    cy = square_size // 2
+    base_r = int(size * 0.42)  
+
+    if is_white:
+        piece_color = (250, 250, 255)  
+        border_color = (180, 200, 220)  
+        shadow_color = (200, 210, 220)  
+    else:
+        piece_color = (30, 30, 40)    
+        border_color = (80, 100, 120)  
+        shadow_color = (60, 70, 80)    
+
+
+    pygame.draw.circle(surf, shadow_color, (cx+2, cy+2), base_r)
+    pygame.draw.circle(surf, piece_color, (cx, cy), base_r)
+    pygame.draw.circle(surf, border_color, (cx, cy), base_r, 2)
+
+
+    if ptype == PieceType.PAWN:
+        head_r = int(base_r * 0.5)
+        pygame.draw.circle(surf, border_color, (cx, cy - int(base_r*0.2)), head_r)
+        pygame.draw.circle(surf, border_color, (cx, cy - int(base_r*0.2)), head_r, 1)
+        pygame.draw.ellipse(surf, border_color, (cx - int(base_r*0.7), cy + int(base_r*0.3), int(base_r*1.4), int(base_r*0.4)))
+
+    elif ptype == PieceType.ROOK:
+        body_rect = pygame.Rect(cx - int(base_r*0.6), cy - int(base_r*0.5), int(base_r*1.2), int(base_r*1.0))
+        pygame.draw.rect(surf, border_color, body_rect, border_radius=4)
+        for i in range(3):
+            bx = cx - int(base_r*0.5) + i * int(base_r*0.5)
+            battlement = pygame.Rect(bx, cy - int(base_r*0.7), int(base_r*0.3), int(base_r*0.2))
+            pygame.draw.rect(surf, border_color, battlement)
+
+    elif ptype == PieceType.KNIGHT:
+        points = [
+            (cx - int(base_r*0.3), cy + int(base_r*0.4)),
+            (cx - int(base_r*0.8), cy + int(base_r*0.2)),
+            (cx - int(base_r*0.6), cy - int(base_r*0.3)),
+            (cx, cy - int(base_r*0.5)),
+            (cx + int(base_r*0.4), cy - int(base_r*0.2)),
+            (cx + int(base_r*0.3), cy + int(base_r*0.4)),
+            (cx - int(base_r*0.3), cy + int(base_r*0.4))
+        ]
+        pygame.draw.polygon(surf, border_color, points)
+        pygame.draw.line(surf, border_color, (cx - int(base_r*0.2), cy - int(base_r*0.4)), 
+                        (cx - int(base_r*0.4), cy - int(base_r*0.6)), 2)
+
+    elif ptype == PieceType.BISHOP:
+        pygame.draw.circle(surf, border_color, (cx, cy), base_r)
+        hat_points = [
+            (cx, cy - int(base_r*0.8)),
+            (cx - int(base_r*0.4), cy - int(base_r*0.2)),
+            (cx + int(base_r*0.4), cy - int(base_r*0.2))
+        ]
+        pygame.draw.polygon(surf, border_color, hat_points)
+        pygame.draw.line(surf, piece_color, (cx, cy - int(base_r*0.3)), (cx, cy + int(base_r*0.1)), 2)
+        pygame.draw.line(surf, piece_color, (cx - int(base_r*0.15), cy - int(base_r*0.1)), (cx + int(base_r*0.15), cy - int(base_r*0.1)), 2)
+
+    elif ptype == PieceType.QUEEN:
+        pygame.draw.circle(surf, border_color, (cx, cy), base_r)
+        for i in range(5):
+            angle = 2 * math.pi * i / 5 - math.pi/2
+            inner_x = cx + math.cos(angle) * base_r * 0.6
+            inner_y = cy + math.sin(angle) * base_r * 0.6
+            outer_x = cx + math.cos(angle) * base_r * 0.9
+            outer_y = cy + math.sin(angle) * base_r * 0.9
+            pygame.draw.line(surf, border_color, (inner_x, inner_y), (outer_x, outer_y), 3)
+        pygame.draw.circle(surf, (255, 215, 0) if is_white else (200, 150, 0), (cx, cy - int(base_r*0.3)), int(base_r*0.15))
+
+    elif ptype == PieceType.KING:
+        pygame.draw.circle(surf, border_color, (cx, cy), base_r)
+        crown_points = [
+            (cx - int(base_r*0.6), cy - int(base_r*0.3)),
+            (cx - int(base_r*0.3), cy - int(base_r*0.6)),
+            (cx, cy - int(base_r*0.8)),
+            (cx + int(base_r*0.3), cy - int(base_r*0.6)),
+            (cx + int(base_r*0.6), cy - int(base_r*0.3))
+        ]
+        pygame.draw.lines(surf, border_color, False, crown_points, 3)
+        pygame.draw.line(surf, border_color, (cx, cy - int(base_r*0.8)), (cx, cy - int(base_r*0.4)), 3)
+        pygame.draw.line(surf, border_color, (cx - int(base_r*0.15), cy - int(base_r*0.6)), (cx + int(base_r*0.15), cy - int(base_r*0.6)), 3)
+
+# ---------------------- DRAW UI ----------------------
+PANEL_X = SCREEN_W - SIDE_PANEL_W - 30
+PANEL_Y = 80
+PANEL_RECT = pygame.Rect(PANEL_X, PANEL_Y, SIDE_PANEL_W, SCREEN_H - PANEL_Y - 40)
+BOARD_RECT = pygame.Rect(BOARD_X, BOARD_Y, BOARD_WIDTH, BOARD_HEIGHT)
+# the part of the panel below its header that draw_info writes into
+INFO_RECT = pygame.Rect(PANEL_X + 4, PANEL_Y + 40, SIDE_PANEL_W - 8, PANEL_RECT.height - 44)
+PLAY_RECT = pygame.Rect(PANEL_X + 16, SCREEN_H - 120, SIDE_PANEL_W - 32, 40)
+# the frame profiler overlay, in the panel between the search readout and the play button
+PROFILE_RECT = pygame.Rect(PANEL_X + 8, PANEL_Y + 320, SIDE_PANEL_W - 16, PLAY_RECT.y - PANEL_Y - 328)
+
+# everything that does not change during a game, rendered once per window size
+_static_layer = None
+_static_key = None
+# what each region showed when it was last drawn; a region is redrawn when this changes
+_region_keys = {}
+# rendered text surfaces, least recently used dropped first
+TEXT_CACHE_SIZE = 256
+_text_cache = OrderedDict()
+# translucent square overlays by (rgba, square size)
+_tints = {}
+# FrameProfiler once profiling starts (--profile, --cprofile or F3), and whether its overlay shows
+_profiler = None
+_profile_overlay = False
+_NO_STAGE = contextlib.nullcontext()
+
+def render_text(font, text, color):
+    """font.render(text, True, color) through a bounded LRU cache."""
+    key = (font, text, color)
+    surf = _text_cache.get(key)
+    if surf is None:
+        surf = font.render(text, True, color)
+        _text_cache[key] = surf
+        if len(_text_cache) > TEXT_CACHE_SIZE:
+            _text_cache.popitem(last=False)
+    else:
+        _text_cache.move_to_end(key)
+    return surf
+
+def tint_square(rgba):
+    key = (rgba, SQUARE_SIZE)
+    s = _tints.get(key)
+    if s is None:
+        s = pygame.Surface((SQUARE_SIZE, SQUARE_SIZE), pygame.SRCALPHA)
+        s.fill(rgba)
+        _tints[key] = s
+    return s
+
+def draw_background(surf):
+    surf.fill((40, 60, 80))
+    glow = pygame.Surface((SCREEN_W, SCREEN_H), pygame.SRCALPHA)
+    pygame.draw.circle(glow, (220, 245, 255, 30), (SCREEN_W//2, TOP_MARGIN//2), SCREEN_W//4)
+    surf.blit(glow, (0,0))
+
+def draw_title_panel(surf):
+    title = TITLE_FONT.render("Cờ vua", True, WHITE)
+    surf.blit(title, (340, 22))
+    panel_rect = PANEL_RECT
+    shadow = pygame.Surface((panel_rect.width, panel_rect.height), pygame.SRCALPHA)
+    shadow.fill((0,0,0,120))
+    surf.blit(shadow, (panel_rect.x+8, panel_rect.y+8))
+    panel = pygame.Surface((panel_rect.width, panel_rect.height), pygame.SRCALPHA)
+    panel.fill((20, 28, 36, 220))
+    surf.blit(panel, (panel_rect.x, panel_rect.y))
+    pygame.draw.rect(surf, SILVER, panel_rect, 2, border_radius=10)
+    header = HEADER_FONT.render("THÔNG TIN", True, ACCENT)
+    surf.blit(header, (panel_rect.x + 16, panel_rect.y + 14))
+    surf.blit(NORMAL_FONT.render("Nhấn M để đổi chế độ", True, SILVER), (PANEL_X + 16, PANEL_Y + 146))
+    return panel_rect
+
+def draw_board_frame(surf):
+    """Frame, squares and coordinates: the part of the board that never changes."""
+    frame = pygame.Rect(BOARD_X-12, BOARD_Y-12, BOARD_WIDTH+24, BOARD_HEIGHT+24)
+    sh = pygame.Surface((frame.width, frame.height), pygame.SRCALPHA)
+    sh.fill(SHADOW)
+    surf.blit(sh, (frame.x+4, frame.y+4)) 
+    pygame.draw.rect(surf, (220, 240, 250), frame, border_radius=12)
+    pygame.draw.rect(surf, (160, 200, 220), frame, 4, border_radius=12) 
+    
+    for r in range(8):
+        for c in range(8):
+            x = BOARD_X + c*SQUARE_SIZE
+            y = BOARD_Y + r*SQUARE_SIZE
+            is_light = ((r + c) % 2 == 0)
+            color = ICE_LIGHT if is_light else ICE_DARK
+            pygame.draw.rect(surf, color, (x, y, SQUARE_SIZE, SQUARE_SIZE))
+
+    for i in range(8):
+        ch = chr(97 + i)
+        tx = XY_FONT.render(ch, True, (100, 130, 160)) 
+        surf.blit(tx, (BOARD_X + i*SQUARE_SIZE + SQUARE_SIZE//2 - tx.get_width()//2, BOARD_Y + BOARD_HEIGHT + 15))
+        num = XY_FONT.render(str(8 - i), True, (100, 130, 160))
+        surf.blit(num, (BOARD_X - 40, BOARD_Y + i*SQUARE_SIZE + SQUARE_SIZE//2 - num.get_height()//2))
+
+def static_layer():
+    """The cached static layers, rebuilt when the window or square size changes."""
+    global _static_layer, _static_key
+    key = (screen.get_size(), SQUARE_SIZE)
+    if _static_layer is None or key != _static_key:
+        layer = pygame.Surface(screen.get_size()).convert()
+        with profile_stage("draw_background"):
+            draw_background(layer)
+        with profile_stage("draw_title_panel"):
+            draw_title_panel(layer)
+        with profile_stage("draw_board_frame"):
+            draw_board_frame(layer)
+        _static_layer = layer
+        _static_key = key
+        _region_keys.clear()
+    return _static_layer
+
+def invalidate_static_layers():
+    """Drop the cached layers and force a full redraw (resize, or the window was exposed)."""
+    global _static_layer
+    _static_layer = None
+    _region_keys.clear()
+
+def restore(rect):
+    """Paint the static layers back over rect, erasing what was drawn there."""
+    screen.blit(static_layer(), rect, rect)
+
+# ---------------------- MOVE ANIMATION ----------------------
+ANIM_MS = 230
+
+class MoveAnimation:
+    """
+    A piece sliding from one square to another. The move is already on the
+    board; this only decides where its sprite is drawn, by elapsed time.
+    """
+    def __init__(self, board_obj: Board, piece, captured, frm, to, start_ms):
+        self.board = board_obj
+        self.piece = piece
+        self.captured = captured
+        self.frm = frm
+        self.to = to
+        self.start_ms = start_ms
+
+    def progress(self, now_ms):
+        return min(1.0, (now_ms - self.start_ms) / ANIM_MS)
+
+    def position(self, now_ms):
+        """Screen x, y of the sliding piece's square."""
+        t = self.progress(now_ms)
+        (fr, fc), (tr, tc) = self.frm, self.to
+        x = BOARD_X + (fc + (tc - fc) * t) * SQUARE_SIZE
+        y = BOARD_Y + (fr + (tr - fr) * t) * SQUARE_SIZE
+        return int(x), int(y)
+
+# the running animation, if any
+_animation = None
+
+def play_animated(board_obj: Board, fr, fc, tr, tc):
+    """Play the move at once and slide its piece; a newer move replaces a running animation."""
+    global _animation
+    piece = board_obj.board[fr][fc]
+    captured = board_obj.board[tr][tc]
+    board_obj.play_move(fr, fc, tr, tc)
+    _animation = MoveAnimation(board_obj, piece, captured, (fr, fc), (tr, tc), pygame.time.get_ticks()) if piece else None
+
+def current_animation(board_obj: Board):
+    """The animation running on board_obj, or None; finished ones are dropped here."""
+    global _animation
+    if _animation is not None and (_animation.board is not board_obj
+                                   or _animation.progress(pygame.time.get_ticks()) >= 1.0):
+        _animation = None
+    return _animation
+
+def draw_board(board_obj: Board):
+    """Pieces and highlights over the squares; the squares themselves come from the static layer."""
+    anim = current_animation(board_obj)
+    if board_obj.last_move:
+        (fr,fc),(tr,tc) = board_obj.last_move
+        for (r,c) in [(fr,fc),(tr,tc)]:
+            screen.blit(tint_square(LAST_MOVE_TINT), (BOARD_X + c*SQUARE_SIZE, BOARD_Y + r*SQUARE_SIZE))
+
+    checked = board_obj.checked_king()
+    if checked:
+        r, c = checked
+        screen.blit(tint_square(CHECK_TINT), (BOARD_X + c*SQUARE_SIZE, BOARD_Y + r*SQUARE_SIZE))
+
+    pulse = (pygame.time.get_ticks() // 200) % 10
+    for (r,c) in board_obj.valid_moves:
+        x = BOARD_X + c*SQUARE_SIZE
+        y = BOARD_Y + r*SQUARE_SIZE
+        alpha = 80 + int(40 * math.sin(pulse * 0.3)) 
+        screen.blit(tint_square((VALID_MOVE_TINT[0], VALID_MOVE_TINT[1], VALID_MOVE_TINT[2], alpha)), (x, y))
+        dot = (x + SQUARE_SIZE//2, y + SQUARE_SIZE//2)
+        dot_r = SQUARE_SIZE//14  
+        pygame.draw.circle(screen, (60,100,120), dot, dot_r)
+
+    if board_obj.selected_piece:
+        r,c = board_obj.selected_piece
+        x = BOARD_X + c*SQUARE_SIZE
+        y = BOARD_Y + r*SQUARE_SIZE
+        alpha = 80 + int(40 * math.sin((pygame.time.get_ticks()//150) * 0.2))  
+        screen.blit(tint_square((HIGHLIGHT_TINT[0], HIGHLIGHT_TINT[1], HIGHLIGHT_TINT[2], alpha)), (x, y))
+        pygame.draw.rect(screen, ACCENT, (x, y, SQUARE_SIZE, SQUARE_SIZE), 2)  
+
+    for r in range(8):
+        for c in range(8):
+            p = board_obj.board[r][c]
+            if anim and (r, c) == anim.to:
+                # the captured piece stays until the mover lands on it
+                p = anim.captured
+            if p:
+                x = BOARD_X + c*SQUARE_SIZE
+                y = BOARD_Y + r*SQUARE_SIZE
+                draw_piece(screen, p, x+5, y+5)
+
+    if anim:
+        x, y = anim.position(pygame.time.get_ticks())
+        draw_piece(screen, anim.piece, x+5, y+5)
+
+def search_readout(stats):
+    """Side panel lines for the AI's last move."""
+    if stats.source in ("book", "tables"):
+        return [f"AI: {stats.source} move"]
+    return [
+        f"Depth {stats.depth}  {stats.seconds * 1000:.0f} ms" + ("  (ponder)" if stats.source == "ponder" else ""),
+        f"Nodes {stats.nodes:,}",
+        f"{stats.nps / 1000:.1f}k nodes/s, {stats.qnodes / stats.nodes if stats.nodes else 0:.0%} q",
+        f"1st-move cutoffs {stats.first_move_cutoff_rate:.0%}",
+        f"Hash hits {stats.hash_hit_rate:.0%}",
+    ]
+
+def draw_info(board_obj: Board, ai_obj: ChessAI, spinner_angle, vs_ai=True):
+    px = SCREEN_W - SIDE_PANEL_W - 30
+    py = 20
+    turn_text = "Lượt: Trắng" if board_obj.turn == PieceColor.WHITE else "Lượt: Đen "
+    tcol = WHITE if board_obj.turn == PieceColor.WHITE else (255,200,200)
+    screen.blit(render_text(HEADER_FONT, turn_text, tcol), (px + 16, py + 110))
+    screen.blit(render_text(NORMAL_FONT, f"Moves: {len(board_obj.move_history)}", WHITE), (px + 16, py + 180))
+    
+    if board_obj.ai_thinking:
+        cx = px + SIDE_PANEL_W - 180
+        cy = py + 160
+        radius = 10
+        pygame.draw.circle(screen, (20,28,36), (cx, cy), radius)
+        start_ang = math.radians(spinner_angle)
+        end_ang = start_ang + math.radians(240)
+        steps = 28
+        for i in range(steps):
+            a1 = start_ang + (end_ang - start_ang) * i / steps
+            a2 = start_ang + (end_ang - start_ang) * (i+1) / steps
+            x1 = cx + int(math.cos(a1)*radius)
+            y1 = cy + int(math.sin(a1)*radius)
+            x2 = cx + int(math.cos(a2)*radius)
+            y2 = cy + int(math.sin(a2)*radius)
+            col = (220,240,255) if i > steps*0.6 else (140,170,190)
+            pygame.draw.line(screen, col, (x1,y1), (x2,y2), 4)
+        screen.blit(render_text(NORMAL_FONT, "Máy đang suy nghỉ", ACCENT), (px + 40, py + 150))
+
+    stats = ai_obj.last_stats
+    if stats is not None and vs_ai:
+        for i, line in enumerate(search_readout(stats)):
+            screen.blit(render_text(NORMAL_FONT, line, SILVER), (px + 16, py + 250 + i * 22))
+
+    mode_text = "Chế độ: Người vs Máy" if vs_ai else "Chế độ: Người vs Người"
+    screen.blit(render_text(NORMAL_FONT, mode_text, WHITE), (PANEL_X + 16, PANEL_Y + 86))
+
+def draw_game_over(board_obj: Board):
+    overlay = pygame.Surface((SCREEN_W, SCREEN_H), pygame.SRCALPHA)
+    overlay.fill((0,0,0,160))
+    screen.blit(overlay, (0,0))
+    if board_obj.winner is None:
+        res = "Hòa!"
+    else:
+        res = "Trắng thắng!" if board_obj.winner == PieceColor.WHITE else "Đen thắng! "
+    txt = render_text(HEADER_FONT, res, GOLD)
+    screen.blit(txt, (SCREEN_W//2 - txt.get_width()//2, SCREEN_H//2 - 40))
+    sub = render_text(NORMAL_FONT, "Nhấn R để bắt đầu lại hoặc ESC để thoát", WHITE)
+    screen.blit(sub, (SCREEN_W//2 - sub.get_width()//2, SCREEN_H//2 + 12))
+    pygame.draw.rect(screen, (100,180,230), PLAY_RECT, border_radius=8)
+    pygame.draw.rect(screen, WHITE, PLAY_RECT, 2, border_radius=8)
+    txt = render_text(NORMAL_FONT, "Bắt đầu  lại (hoặc nhấn R)", WHITE)
+    screen.blit(txt, (PLAY_RECT.x + PLAY_RECT.width//2 - txt.get_width()//2, PLAY_RECT.y + PLAY_RECT.height//2 - txt.get_height()//2))
+
+def profile_stage(name):
+    """Times a draw stage while the profiler runs; does nothing otherwise."""
+    return _profiler.stage(name) if _profiler is not None else _NO_STAGE
+
+def toggle_profile_overlay():
+    """F3: show or hide the profiler overlay, starting the profiler the first time."""
+    global _profiler, _profile_overlay
+    if _profiler is None:
+        _profiler = FrameProfiler()
+    _profile_overlay = not _profile_overlay
+    _region_keys.clear()
+
+def draw_profile_overlay(prof: FrameProfiler):
+    """Frame and stage percentiles over the profiler's window, and a histogram of frame times."""
+    r = PROFILE_RECT
+    pygame.draw.rect(screen, (10, 14, 20), r, border_radius=6)
+    pygame.draw.rect(screen, SILVER, r, 1, border_radius=6)
+    # name, then p50/p95/p99 right-aligned at fixed columns: the fallback font is not monospaced
+    rows = [("ms", "p50", "p95", "p99")]
+    for name, _, _, p50, p95, p99, _ in prof.rows()[:9]:
+        rows.append((name.replace("draw_", "").replace("display.", "")[:11],
+                     f"{p50:.2f}", f"{p95:.2f}", f"{p99:.2f}"))
+    y = r.y + 6
+    for row in rows:
+        screen.blit(render_text(PROFILE_FONT, row[0], (200, 210, 220)), (r.x + 6, y))
+        for i, cell in enumerate(row[1:]):
+            txt = render_text(PROFILE_FONT, cell, (200, 210, 220))
+            screen.blit(txt, (r.x + 92 + i * 42 - txt.get_width(), y))
+        y += PROFILE_FONT.get_linesize()
+    counts = prof.histogram()
+    top = max(counts) or 1
+    bar_w = (r.width - 12) // len(counts)
+    base = r.bottom - 20
+    height = base - y - 6
+    for i, n in enumerate(counts):
+        h = max(1, n * height // top) if n else 0
+        # red: buckets reaching past one frame at FPS
+        slow = i == len(HISTOGRAM_EDGES_MS) or HISTOGRAM_EDGES_MS[i] > 1000 / FPS
+        pygame.draw.rect(screen, ACCENT if slow else GOLD,
+                         (r.x + 6 + i * bar_w, base - h, bar_w - 2, h))
+    label = f"{HISTOGRAM_EDGES_MS[0]:g} .. {HISTOGRAM_EDGES_MS[-1]:g} ms,  {len(prof.frames)} frames"
+    screen.blit(render_text(PROFILE_FONT, label, SILVER), (r.x + 6, base + 3))
+
+def board_key(board_obj: Board):
+    """Everything draw_board shows; the highlight pulse and a sliding piece are included while they move."""
+    ticks = pygame.time.get_ticks()
+    pulse = None
+    if board_obj.selected_piece or board_obj.valid_moves:
+        pulse = (ticks // 200, ticks // 150)
+    anim = current_animation(board_obj)
+    return (board_obj.position.hash, board_obj.last_move, board_obj.selected_piece,
+            tuple(board_obj.valid_moves), pulse, anim.position(ticks) if anim else None)
+
+def draw_frame(board_obj: Board, ai_obj: ChessAI, spinner_angle, vs_ai=True):
+    """
+    Redraw only the regions whose content changed since the last frame and
+    push just those rectangles to the display. The game-over screen is drawn
+    once and then left alone. Timed stage by stage while profiling.
+    """
+    if _profiler is None:
+        _draw_regions(board_obj, ai_obj, spinner_angle, vs_ai)
+        return
+    _profiler.begin_frame()
+    _draw_regions(board_obj, ai_obj, spinner_angle, vs_ai)
+    _profiler.end_frame()
+
+def _draw_regions(board_obj, ai_obj, spinner_angle, vs_ai):
+    layer = static_layer()
+    # the game-over screen waits for the last move to finish sliding
+    over = (board_obj.game_over and current_animation(board_obj) is None, board_obj.winner)
+    full = not _region_keys or _region_keys.get("over") != over
+    if over[0] and not full:
+        return
+    if full:
+        screen.blit(layer, (0, 0))
+    dirty = []
+    key = board_key(board_obj)
+    if full or _region_keys.get("board") != key:
+        if not full:
+            with profile_stage("restore"):
+                restore(BOARD_RECT)
+        with profile_stage("draw_board"):
+            draw_board(board_obj)
+        dirty.append(BOARD_RECT)
+    _region_keys["board"] = key
+    key = (board_obj.turn, len(board_obj.move_history), vs_ai, board_obj.ai_thinking,
+           spinner_angle if board_obj.ai_thinking else None, ai_obj.last_stats)
+    info_drawn = full or _region_keys.get("info") != key
+    if info_drawn:
+        if not full:
+            with profile_stage("restore"):
+                restore(INFO_RECT)
+        with profile_stage("draw_info"):
+            draw_info(board_obj, ai_obj, spinner_angle, vs_ai)
+        dirty.append(INFO_RECT)
+    _region_keys["info"] = key
+    if _profile_overlay:
+        # refreshed twice a second; draw_info clears it when the panel is redrawn
+        key = pygame.time.get_ticks() // 500
+        if info_drawn or _region_keys.get("profile") != key:
+            with profile_stage("overlay"):
+                draw_profile_overlay(_profiler)
+            dirty.append(PROFILE_RECT)
+        _region_keys["profile"] = key
+    _region_keys["over"] = over
+    if full:
+        if over[0]:
+            with profile_stage("draw_game_over"):
+                draw_game_over(board_obj)
+        with profile_stage("display.flip"):
+            pygame.display.flip()
+    elif dirty:
+        with profile_stage("display.update"):
+            pygame.display.update(dirty)
+
+def select_by_mouse(board_obj: Board, mx, my):
+    col = (mx - BOARD_X) // SQUARE_SIZE
+    row = (my - BOARD_Y) // SQUARE_SIZE
+    move = board_obj.select_square(row, col)
+    if move:
+        (fr, fc), (tr, tc) = move
+        play_animated(board_obj, fr, fc, tr, tc)
+
+# ---------------------- MAIN LOOP ----------------------
+def next_events(board_obj: Board, fps, idle_fps):
+    """
+    Wait as long as the current state allows, then return the pending
+    events: frames at fps while a piece slides or the AI thinks, PULSE_FPS
+    while a selection pulses, idle_fps otherwise. With idle_fps 0 an idle
+    window blocks on pygame.event.wait until input arrives.
+    """
+    # _animation is cleared by the frame that draws the landing, so that frame still comes at fps
+    if board_obj.ai_thinking or _animation is not None:
+        clock.tick(fps)
+    elif board_obj.selected_piece or board_obj.valid_moves:
+        clock.tick(max(PULSE_FPS, idle_fps))
+    elif idle_fps:
+        clock.tick(idle_fps)
+    else:
+        # some video drivers cannot block and poll inside SDL instead: use idle_fps there
+        first = pygame.event.wait()
+        clock.tick()
+        return [first] + pygame.event.get()
+    return pygame.event.get()
+
+def main(fps=None, idle_fps=None, search_log=None, profile=False, cprofile_frames=0, cprofile_out=None,
+         ponder=False, workers=None):
+    """
+    Run the game window. profile starts the frame profiler with its overlay
+    shown (F3 toggles it); cprofile_frames also runs cProfile inside that
+    many frames. The profile summary is printed on exit. ponder lets the
+    AI search on the player's expected reply while the player thinks.
+    workers > 1 gives the AI a pool of that many search processes.
+    """
+    global _profiler, _profile_overlay
+    fps = fps or FPS
+    idle_fps = IDLE_FPS if idle_fps is None else idle_fps
+    init_display()
+    load_piece_images(SQUARE_SIZE)
+    print(f"Using images: {use_images}")
+    board = Board()
+    ai = ChessAI(PieceColor.BLACK, depth=3, time_budget_ms=AI_TIME_MS, workers=workers or AI_WORKERS)
+    if search_log:
+        ai.stats_log = open(search_log, "a", encoding="utf-8")
+    worker = AIWorker(ai)
+    if profile or cprofile_frames:
+        _profiler = FrameProfiler(cprofile_frames=cprofile_frames, cprofile_out=cprofile_out)
+        _profile_overlay = profile
+    running = True
+    vs_ai = True  
+
+    while running:
+        for event in next_events(board, fps, idle_fps):
+            if event.type == pygame.QUIT:
+                running = False
+            if event.type in (pygame.VIDEORESIZE, pygame.VIDEOEXPOSE):
+                invalidate_static_layers()
+            if event.type == pygame.KEYDOWN:
+                if event.key == pygame.K_ESCAPE:
+                    running = False
+                if event.key == pygame.K_r:
+                    worker.cancel()
+                    board = Board()
+                if event.key == pygame.K_F3:
+                    toggle_profile_overlay()
+                if event.key == pygame.K_m:  #
+                    vs_ai = not vs_ai
+                    # stops a search or a ponder search
+                    worker.cancel()
+                    board.ai_thinking = False
+            if event.type == pygame.MOUSEBUTTONDOWN and event.button == 1:
+                mx, my = event.pos
+                if BOARD_X <= mx <= BOARD_X + BOARD_WIDTH and BOARD_Y <= my <= BOARD_Y + BOARD_HEIGHT:
+                    if not board.game_over:
+                        if not vs_ai or (vs_ai and board.turn == PieceColor.WHITE):
+                            select_by_mouse(board, mx, my)
+                if PLAY_RECT.collidepoint((mx,my)) and board.game_over:
+                    worker.cancel()
+                    board = Board()
+
+        if (not board.game_over and vs_ai and 
+            board.turn == PieceColor.BLACK and 
+            not board.ai_thinking):
+            
+            board.ai_thinking = True
+            worker.start(board)
+
+        if board.ai_thinking:
+            done, best = worker.poll()
+            if done:
+                if best:
+                    fr_fc, to = best
+                    fr, fc = fr_fc
+                    tr, tc = to
+                    play_animated(board, fr, fc, tr, tc)
+
+                board.ai_thinking = False
+                if ponder and best and not board.game_over:
+                    worker.ponder(board)
+
+        # the spinner turns 8 degrees per 1/60 s whatever the frame rate
+        spinner_angle = int(pygame.time.get_ticks() * 0.48) % 360
+        draw_frame(board, ai, spinner_angle, vs_ai)
+
+    worker.cancel()
+    ai.close()
+    if ponder:
+        print(f"Ponder: {worker.ponder_hits} hits, {worker.ponder_misses} misses")
+    if ai.stats_log is not None:
+        ai.stats_log.close()
+    if _profiler is not None:
+        _profiler.finish()
+    pygame.quit()
+    sys.exit()